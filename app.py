@@ -34,6 +34,7 @@ from google.cloud import storage
 import redis
 from rq import Queue
 from functools import wraps
+from bisect import bisect_left, bisect_right
 
 
 # --- Flask App Configuration ---
@@ -58,6 +59,9 @@ DB_QUEUES_LOCK = threading.Lock() # To safely add/remove from the dict
 db_build_status = {"running": False, "error": None, "current_build_id": None}
 db_build_status_lock = threading.Lock()
 
+# Weekday abbreviations indexed by date.weekday(); avoids strftime('%a') per game.
+_DAY_NAMES = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
 # --- Yahoo OAuth2 Settings ---
 authorization_base_url = 'https://api.login.yahoo.com/oauth2/request_auth'
 token_url = 'https://api.login.yahoo.com/oauth2/get_token'
@@ -320,6 +324,16 @@ def get_db_connection_for_league(league_id):
         return None, "Could not connect to the database."
 
 
+def _json_response(payload):
+    """
+    Serializes a payload as compact JSON without jsonify's key sorting, for
+    large payloads whose consumers do not depend on key order. The body is
+    built before returning, so a serialization error raises inside the
+    calling view and goes through its error handling.
+    """
+    return Response(json.dumps(payload, separators=(',', ':')), mimetype='application/json')
+
+
 def decode_dict_values(data):
     """Recursively decodes byte strings in a dictionary or list of dictionaries."""
     if isinstance(data, list):
@@ -480,16 +494,10 @@ def _get_ranked_roster_for_week(cursor, team_id, week_num, team_stats_map, sourc
         start_date_next = week_dates_next['start_date'] # Keep as string for SQL
         end_date_next = week_dates_next['end_date']     # Keep as string for SQL
 
-    # --- [START] NEW: Fetch THIS WEEK'S schedule ---
-    schedule_data_this_week = []
-    cursor.execute("SELECT game_date, home_team, away_team FROM schedule WHERE game_date >= ? AND game_date <= ?", (start_date, end_date))
-    schedule_data_this_week = decode_dict_values([dict(row) for row in cursor.fetchall()])
-
-    # --- [START] NEW: Fetch NEXT WEEK'S schedule ---
-    schedule_data_next_week = []
-    if start_date_next and end_date_next:
-        cursor.execute("SELECT game_date, home_team, away_team FROM schedule WHERE game_date >= ? AND game_date <= ?", (start_date_next, end_date_next))
-        schedule_data_next_week = decode_dict_values([dict(row) for row in cursor.fetchall()])
+    # --- Index THIS WEEK'S and NEXT WEEK'S schedule by team ---
+    games_by_team_this_week, games_by_team_next_week = _get_week_games_by_team(
+        cursor, start_date, end_date, start_date_next, end_date_next
+    )
 
     cursor.execute("""
         SELECT
@@ -507,61 +515,12 @@ def _get_ranked_roster_for_week(cursor, team_id, week_num, team_stats_map, sourc
     scoring_categories = [row['category'] for row in cursor.fetchall()]
     cat_rank_columns = [f"{cat}_cat_rank" for cat in scoring_categories]
 
-    # --- [START] MODIFICATION: Use schedule_data list ---
+    opponent_stats_cache = {}
     for player in players:
-        player['game_dates_this_week'] = []
-        player['games_this_week'] = []
-        player['games_next_week'] = []
-        player['opponents_list'] = []
-        player['opponent_stats_this_week'] = []
-
-        player_team = player.get('team')
-        if not player_team:
-            continue
-
-        # 1. Find This Week's Games & Opponents
-        games_this_week = [
-            g for g in schedule_data_this_week
-            if g['home_team'] == player_team or g['away_team'] == player_team
-        ]
-        games_this_week.sort(key=lambda g: g['game_date'])
-
-        for game in games_this_week:
-            game_date = datetime.strptime(game['game_date'], '%Y-%m-%d').date()
-            player['game_dates_this_week'].append(game['game_date'])
-            player['games_this_week'].append(game_date.strftime('%a'))
-
-            opponent_tricode = game['away_team'] if game['home_team'] == player_team else game['home_team']
-
-            if opponent_tricode:
-                player['opponents_list'].append(opponent_tricode)
-                opponent_stats = team_stats_map.get(opponent_tricode, {})
-
-                player['opponent_stats_this_week'].append({
-                    'game_date': game_date.strftime('%a, %b %d'),
-                    'opponent_tricode': opponent_tricode,
-                    'ga_gm': opponent_stats.get('ga_gm'),
-                    'soga_gm': opponent_stats.get('soga_gm'),
-                    'ga_gm_weekly': opponent_stats.get('ga_gm_weekly'),
-                    'soga_gm_weekly': opponent_stats.get('soga_gm_weekly'),
-                    'gf_gm': opponent_stats.get('gf_gm'),
-                    'sogf_gm': opponent_stats.get('sogf_gm'),
-                    'gf_gm_weekly': opponent_stats.get('gf_gm_weekly'),
-                    'sogf_gm_weekly': opponent_stats.get('sogf_gm_weekly'),
-                    'pk_pct': opponent_stats.get('pk_pct'),
-                    'pk_pct_weekly': opponent_stats.get('pk_pct_weekly')
-                })
-
-        # 2. Find Next Week's Games
-        games_next_week = [
-            g for g in schedule_data_next_week
-            if g['home_team'] == player_team or g['away_team'] == player_team
-        ]
-        games_next_week.sort(key=lambda g: g['game_date'])
-        for game in games_next_week:
-            game_date = datetime.strptime(game['game_date'], '%Y-%m-%d').date()
-            player['games_next_week'].append(game_date.strftime('%a'))
-    # --- [END] MODIFICATION ---
+        _add_week_games(
+            player, player.get('team'), 'game_dates_this_week',
+            games_by_team_this_week, games_by_team_next_week, team_stats_map, opponent_stats_cache
+        )
 
     active_players = [p for p in players if not any(pos.strip().startswith('IR') for pos in p['eligible_positions'].split(','))]
     normalized_names = [p['player_name_normalized'] for p in active_players]
@@ -602,8 +561,8 @@ def _calculate_unused_spots(days_in_week, active_players, lineup_settings, simul
 
     today = date.today()
     for day_date in days_in_week:
-        day_str = day_date.strftime('%Y-%m-%d')
-        day_name = day_date.strftime('%a')
+        day_str = day_date.isoformat()
+        day_name = _DAY_NAMES[day_date.weekday()]
 
         daily_active_roster = _get_daily_simulated_roster(active_players, simulated_moves, day_str)
 
@@ -650,9 +609,100 @@ def _calculate_unused_spots(days_in_week, active_players, lineup_settings, simul
 
     return unused_spots_data
 
-def _get_ranked_players(cursor, player_ids, cat_rank_columns, raw_stat_columns, week_num, team_stats_map, sourcing='projected'):
+def _get_games_by_team(cursor, start_date, end_date):
+    """
+    Streams the schedule rows for a date range and indexes them by team.
+    Returns {team_tricode: [(game_date_str, game_date, opponent_tricode), ...]}
+    in date order, with each game date parsed once rather than per player.
+    """
+    cursor.execute(
+        "SELECT game_date, home_team, away_team FROM schedule WHERE game_date >= ? AND game_date <= ? ORDER BY game_date",
+        (start_date, end_date)
+    )
+    games_by_team = defaultdict(list)
+    for game_date, home_team, away_team in cursor:
+        if isinstance(game_date, bytes): game_date = game_date.decode('utf-8')
+        if isinstance(home_team, bytes): home_team = home_team.decode('utf-8')
+        if isinstance(away_team, bytes): away_team = away_team.decode('utf-8')
+        game_date_obj = date.fromisoformat(game_date)
+        games_by_team[home_team].append((game_date, game_date_obj, away_team))
+        games_by_team[away_team].append((game_date, game_date_obj, home_team))
+    return games_by_team
+
+
+def _get_week_games_by_team(cursor, start_date, end_date, start_date_next=None, end_date_next=None):
+    """
+    Fetches this week's and, if given, next week's games with a single schedule
+    query, then splits each team's date-ordered games at the week boundaries
+    with bisect. Returns (games_by_team_this_week, games_by_team_next_week).
+    """
+    if not (start_date_next and end_date_next):
+        return _get_games_by_team(cursor, start_date, end_date), {}
+
+    games_by_team = _get_games_by_team(cursor, start_date, end_date_next)
+    games_by_team_this_week = {}
+    games_by_team_next_week = {}
+    for team, games in games_by_team.items():
+        game_dates = [game[0] for game in games]
+        games_by_team_this_week[team] = games[:bisect_right(game_dates, end_date)]
+        games_by_team_next_week[team] = games[bisect_left(game_dates, start_date_next):bisect_right(game_dates, end_date_next)]
+    return games_by_team_this_week, games_by_team_next_week
+
+
+def _add_week_games(player, player_team, dates_key, games_by_team_this_week, games_by_team_next_week, team_stats_map, opponent_stats_cache):
+    """
+    Fills a player's schedule, opponent and next-week fields from the per-team
+    game indexes built by _get_games_by_team. Only reads the shared inputs.
+    Opponent stat records are read-only and shared through opponent_stats_cache,
+    so teammates reference one record per game instead of each getting a copy.
+    """
+    player['games_this_week'] = []
+    player['games_next_week'] = []
+    player[dates_key] = []
+    player['opponents_list'] = []
+    player['opponent_stats_this_week'] = []
+
+    if not player_team:
+        return
+
+    # 1. This Week's Games & Opponents
+    for game_date_str, game_date, opponent_tricode in games_by_team_this_week.get(player_team, ()):
+        player['games_this_week'].append(_DAY_NAMES[game_date.weekday()])
+        player[dates_key].append(game_date_str)
+
+        if opponent_tricode:
+            player['opponents_list'].append(opponent_tricode)
+
+            cache_key = (game_date_str, opponent_tricode)
+            opponent_game_stats = opponent_stats_cache.get(cache_key)
+            if opponent_game_stats is None:
+                opponent_stats = team_stats_map.get(opponent_tricode, {})
+                opponent_game_stats = opponent_stats_cache[cache_key] = {
+                    'game_date': game_date.strftime('%a, %b %d'),
+                    'opponent_tricode': opponent_tricode,
+                    'ga_gm': opponent_stats.get('ga_gm'),
+                    'soga_gm': opponent_stats.get('soga_gm'),
+                    'ga_gm_weekly': opponent_stats.get('ga_gm_weekly'),
+                    'soga_gm_weekly': opponent_stats.get('soga_gm_weekly'),
+                    'gf_gm': opponent_stats.get('gf_gm'),
+                    'sogf_gm': opponent_stats.get('sogf_gm'),
+                    'gf_gm_weekly': opponent_stats.get('gf_gm_weekly'),
+                    'sogf_gm_weekly': opponent_stats.get('sogf_gm_weekly'),
+                    'pk_pct': opponent_stats.get('pk_pct'),
+                    'pk_pct_weekly': opponent_stats.get('pk_pct_weekly')
+                }
+            player['opponent_stats_this_week'].append(opponent_game_stats)
+
+    # 2. Next Week's Games
+    for _, game_date, _ in games_by_team_next_week.get(player_team, ()):
+        player['games_next_week'].append(_DAY_NAMES[game_date.weekday()])
+
+
+def _get_ranked_players(cursor, player_ids, cat_rank_columns, raw_stat_columns, week_num, team_stats_map, sourcing='projected', rank_weights=None):
     """
     Internal helper to fetch player details, ranks, and schedules for a list of player IDs.
+    rank_weights is an optional list of (rank_column, weight) pairs used for
+    total_cat_rank; by default every column in cat_rank_columns counts fully.
     """
     stat_table = get_stat_source_table(sourcing)
     if not player_ids:
@@ -673,17 +723,12 @@ def _get_ranked_players(cursor, player_ids, cat_rank_columns, raw_stat_columns,
         start_date_next = week_dates_next['start_date'] # Keep as string for SQL
         end_date_next = week_dates_next['end_date']     # Keep as string for SQL
 
-    # --- [START] NEW: Fetch THIS WEEK'S schedule ---
-    schedule_data_this_week = []
+    # --- Index THIS WEEK'S and NEXT WEEK'S schedule by team ---
+    games_by_team_this_week, games_by_team_next_week = {}, {}
     if start_date and end_date:
-        cursor.execute("SELECT game_date, home_team, away_team FROM schedule WHERE game_date >= ? AND game_date <= ?", (start_date, end_date))
-        schedule_data_this_week = decode_dict_values([dict(row) for row in cursor.fetchall()])
-
-    # --- [START] NEW: Fetch NEXT WEEK'S schedule ---
-    schedule_data_next_week = []
-    if start_date_next and end_date_next:
-        cursor.execute("SELECT game_date, home_team, away_team FROM schedule WHERE game_date >= ? AND game_date <= ?", (start_date_next, end_date_next))
-        schedule_data_next_week = decode_dict_values([dict(row) for row in cursor.fetchall()])
+        games_by_team_this_week, games_by_team_next_week = _get_week_games_by_team(
+            cursor, start_date, end_date, start_date_next, end_date_next
+        )
 
     placeholders = ','.join('?' for _ in player_ids)
     base_columns = ['player_id', 'player_name', 'player_team', 'positions', 'status', 'player_name_normalized']
@@ -703,66 +748,19 @@ def _get_ranked_players(cursor, player_ids, cat_rank_columns, raw_stat_columns,
     players_raw = cursor.fetchall()
     players = decode_dict_values([dict(row) for row in players_raw])
 
+    if rank_weights is None:
+        rank_weights = [(col, 1.0) for col in cat_rank_columns]
+
     # Calculate total rank and add schedules
+    opponent_stats_cache = {}
     for player in players:
-        total_rank = sum(player.get(col, 0) or 0 for col in cat_rank_columns)
+        total_rank = sum((player.get(col) or 0) * weight for col, weight in rank_weights)
         player['total_cat_rank'] = round(total_rank, 2)
 
-        player['games_this_week'] = []
-        player['games_next_week'] = []
-        player['game_dates_this_week_full'] = []
-        player['opponents_list'] = []
-        player['opponent_stats_this_week'] = []
-
-        player_team = player.get('player_team')
-        if not player_team:
-            continue
-
-        # --- [START] REPLACEMENT LOGIC (The Performance & Accuracy Fix) ---
-
-        # 1. Find This Week's Games & Opponents
-        games_this_week = [
-            g for g in schedule_data_this_week
-            if g['home_team'] == player_team or g['away_team'] == player_team
-        ]
-        games_this_week.sort(key=lambda g: g['game_date']) # Sort just in case
-
-        for game in games_this_week:
-            game_date = datetime.strptime(game['game_date'], '%Y-%m-%d').date()
-            player['games_this_week'].append(game_date.strftime('%a'))
-            player['game_dates_this_week_full'].append(game['game_date'])
-
-            opponent_tricode = game['away_team'] if game['home_team'] == player_team else game['home_team']
-
-            if opponent_tricode:
-                player['opponents_list'].append(opponent_tricode)
-                opponent_stats = team_stats_map.get(opponent_tricode, {})
-
-                player['opponent_stats_this_week'].append({
-                    'game_date': game_date.strftime('%a, %b %d'),
-                    'opponent_tricode': opponent_tricode,
-                    'ga_gm': opponent_stats.get('ga_gm'),
-                    'soga_gm': opponent_stats.get('soga_gm'),
-                    'ga_gm_weekly': opponent_stats.get('ga_gm_weekly'),
-                    'soga_gm_weekly': opponent_stats.get('soga_gm_weekly'),
-                    'gf_gm': opponent_stats.get('gf_gm'),
-                    'sogf_gm': opponent_stats.get('sogf_gm'),
-                    'gf_gm_weekly': opponent_stats.get('gf_gm_weekly'),
-                    'sogf_gm_weekly': opponent_stats.get('sogf_gm_weekly'),
-                    'pk_pct': opponent_stats.get('pk_pct'),
-                    'pk_pct_weekly': opponent_stats.get('pk_pct_weekly')
-                })
-
-        # 2. Find Next Week's Games
-        games_next_week = [
-            g for g in schedule_data_next_week
-            if g['home_team'] == player_team or g['away_team'] == player_team
-        ]
-        games_next_week.sort(key=lambda g: g['game_date'])
-        for game in games_next_week:
-            game_date = datetime.strptime(game['game_date'], '%Y-%m-%d').date()
-            player['games_next_week'].append(game_date.strftime('%a'))
-        # --- [END] REPLACEMENT LOGIC ---
+        _add_week_games(
+            player, player.get('player_team'), 'game_dates_this_week_full',
+            games_by_team_this_week, games_by_team_next_week, team_stats_map, opponent_stats_cache
+        )
 
     return players
 
@@ -1058,7 +1056,7 @@ def get_matchup_stats():
         projection_start_date = max(today, start_date_obj)
         current_date = projection_start_date
         while current_date <= end_date_obj:
-            current_date_str = current_date.strftime('%Y-%m-%d')
+            current_date_str = current_date.isoformat()
             t1_daily_roster = _get_daily_simulated_roster(team1_ranked_roster, simulated_moves, current_date_str)
             t1_players_today = []
             for p in t1_daily_roster:
@@ -1109,7 +1107,7 @@ def get_matchup_stats():
                 elif isinstance(value, (int, float)) and cat not in ['GAA', 'SVpct']:
                     row_stats[cat] = round(value, 1)
         for day_date in days_in_week:
-            day_str = day_date.strftime('%Y-%m-%d')
+            day_str = day_date.isoformat()
             t1_daily_roster = _get_daily_simulated_roster(team1_ranked_roster, simulated_moves, day_str)
             t1_players_today = []
             for p in t1_daily_roster:
@@ -3006,20 +3004,7 @@ def get_roster_data():
         end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
         days_in_week = [(start_date + timedelta(days=i)) for i in range((end_date - start_date).days + 1)]
 
-        cursor.execute("SELECT start_date, end_date FROM weeks WHERE week_num = ?", (week_num + 1,))
-        week_next = cursor.fetchone()
-
-        # 4. Fetch Schedule Data (Needed for Simulated Players)
-        schedule_this_week = []
-        cursor.execute("SELECT game_date, home_team, away_team FROM schedule WHERE game_date >= ? AND game_date <= ?", (start_date_str, end_date_str))
-        schedule_this_week = decode_dict_values([dict(row) for row in cursor.fetchall()])
-
-        schedule_next_week = []
-        if week_next:
-            cursor.execute("SELECT game_date, home_team, away_team FROM schedule WHERE game_date >= ? AND game_date <= ?", (week_next['start_date'], week_next['end_date']))
-            schedule_next_week = decode_dict_values([dict(row) for row in cursor.fetchall()])
-
-        # 5. Get Team Stats Map
+        # 4. Get Team Stats Map
         team_stats_map = {}
         cursor.execute("SELECT * FROM team_stats_summary")
         for row in cursor.fetchall(): team_stats_map[row['team_tricode']] = dict(row)
@@ -3027,10 +3012,10 @@ def get_roster_data():
         for row in cursor.fetchall():
             if row['team_tricode'] in team_stats_map: team_stats_map[row['team_tricode']].update(dict(row))
 
-        # 6. Get Base Roster (Active Players)
+        # 5. Get Base Roster (Active Players)
         active_players = _get_ranked_roster_for_week(cursor, team_id, week_num, team_stats_map, sourcing)
 
-        # 7. Get All Players (Base + Simulated)
+        # 6. Get All Players (Base + Simulated)
         cursor.execute("""
             SELECT p.player_id, p.player_name, p.player_team as team, rp.eligible_positions, p.player_name_normalized, p.status
             FROM rosters_tall r
@@ -3062,7 +3047,7 @@ def get_roster_data():
                     all_players.append(added)
                     existing_ids.add(int(added.get('player_id', 0)))
 
-        # 8. Fetch Stats & Ranks for EVERYONE (Base + Sim)
+        # 7. Fetch Stats & Ranks for EVERYONE (Base + Sim)
         cat_rank_columns = [f"{cat}_cat_rank" for cat in all_scoring_categories]
         raw_stat_columns = [f'"{cat}"' for cat in all_scoring_categories]
         all_cols = list(set(cat_rank_columns + raw_stat_columns))
@@ -3080,10 +3065,23 @@ def get_roster_data():
             cursor.execute(query, valid_names)
             player_stats = {row['player_name_normalized']: dict(row) for row in cursor.fetchall()}
 
-        # 9. Enrich All Players (Schedule + Stats)
+        # 8. Enrich All Players (Schedule + Stats)
         player_custom_rank_map = {}
         active_player_map = {p['player_name']: p for p in active_players} # Base roster only
 
+        # Schedule Data (only needed for simulated players, so fetched lazily)
+        games_by_team_this_week = {}
+        games_by_team_next_week = {}
+        opponent_stats_cache = {}
+        if any(p['player_name'] not in active_player_map for p in all_players):
+            cursor.execute("SELECT start_date, end_date FROM weeks WHERE week_num = ?", (week_num + 1,))
+            week_next = cursor.fetchone()
+            start_date_next = week_next['start_date'] if week_next else None
+            end_date_next = week_next['end_date'] if week_next else None
+            games_by_team_this_week, games_by_team_next_week = _get_week_games_by_team(
+                cursor, start_date_str, end_date_str, start_date_next, end_date_next
+            )
+
         for player in all_players:
             # A. Schedule & Opponents
             if player['player_name'] in active_player_map:
@@ -3093,38 +3091,10 @@ def get_roster_data():
                     player[k] = source.get(k, [])
             else:
                 # --- NEW: Calculate for Simulated Players ---
-                player['games_this_week'] = []
-                player['game_dates_this_week'] = []
-                player['games_next_week'] = []
-                player['opponents_list'] = []
-                player['opponent_stats_this_week'] = []
-
-                p_team = player.get('team')
-                if p_team:
-                    # This Week
-                    p_games = [g for g in schedule_this_week if g['home_team'] == p_team or g['away_team'] == p_team]
-                    p_games.sort(key=lambda x: x['game_date'])
-                    for g in p_games:
-                        g_date = datetime.strptime(g['game_date'], '%Y-%m-%d').date()
-                        player['games_this_week'].append(g_date.strftime('%a'))
-                        player['game_dates_this_week'].append(g['game_date'])
-
-                        opp = g['away_team'] if g['home_team'] == p_team else g['home_team']
-                        player['opponents_list'].append(opp)
-
-                        opp_stats = team_stats_map.get(opp, {})
-                        player['opponent_stats_this_week'].append({
-                            'game_date': g_date.strftime('%a, %b %d'),
-                            'opponent_tricode': opp,
-                            **{k: opp_stats.get(k) for k in ['ga_gm', 'soga_gm', 'gf_gm', 'sogf_gm', 'pk_pct']}
-                        })
-
-                    # Next Week
-                    p_next = [g for g in schedule_next_week if g['home_team'] == p_team or g['away_team'] == p_team]
-                    p_next.sort(key=lambda x: x['game_date'])
-                    for g in p_next:
-                        g_date = datetime.strptime(g['game_date'], '%Y-%m-%d').date()
-                        player['games_next_week'].append(g_date.strftime('%a'))
+                _add_week_games(
+                    player, player.get('team'), 'game_dates_this_week',
+                    games_by_team_this_week, games_by_team_next_week, team_stats_map, opponent_stats_cache
+                )
 
             # B. Stats & Ranks
             p_data = player_stats.get(player.get('player_name_normalized'))
@@ -3149,14 +3119,14 @@ def get_roster_data():
             if player.get('player_id'):
                 player_custom_rank_map[int(player['player_id'])] = player['total_rank']
 
-        # 10. Final Lineup/Usage Calc
+        # 9. Final Lineup/Usage Calc
         lineup_settings = {row['position']: row['position_count'] for row in cursor.execute("SELECT position, position_count FROM lineup_settings WHERE position NOT IN ('BN', 'IR', 'IR+')")}
 
         daily_optimal_lineups = {}
         player_starts_counter = Counter()
 
         for day_date in days_in_week:
-            day_str = day_date.strftime('%Y-%m-%d')
+            day_str = day_date.isoformat()
             # Pass base_roster_players (the original DB roster) to the calculation.
             # The helper function will:
             # 1. Check base roster players against drops for this date.
@@ -3235,14 +3205,14 @@ def get_free_agent_data():
         target_week = None
 
         if selected_week_str:
-            try:
+            if str(selected_week_str).strip().isdecimal():
                 target_week = int(selected_week_str)
                 cursor.execute("SELECT 1 FROM weeks WHERE week_num = ?", (target_week,))
                 if not cursor.fetchone():
                     target_week = None
-                    logging.warn(f"Selected week '{selected_week_str}' not found in database. Falling back to current week.")
-            except ValueError:
-                logging.warn(f"Invalid selected_week value: '{selected_week_str}'. Falling back to current week.")
+                    logging.warning(f"Selected week '{selected_week_str}' not found in database. Falling back to current week.")
+            else:
+                logging.warning(f"Invalid selected_week value: '{selected_week_str}'. Falling back to current week.")
 
         if target_week is None:
             today = date.today().isoformat()
@@ -3268,27 +3238,23 @@ def get_free_agent_data():
 
         cursor.execute("SELECT player_id FROM waiver_players")
         waiver_player_ids = [row['player_id'] for row in cursor.fetchall()]
-        # --- MODIFIED: Pass only team_stats_map ---
-        waiver_players = _get_ranked_players(cursor, waiver_player_ids, all_cat_rank_columns, raw_stat_columns, target_week, team_stats_map, sourcing)
 
         cursor.execute("SELECT player_id FROM free_agents")
         free_agent_ids = [row['player_id'] for row in cursor.fetchall()]
-        # --- MODIFIED: Pass only team_stats_map ---
-        free_agents = _get_ranked_players(cursor, free_agent_ids, all_cat_rank_columns, raw_stat_columns, target_week, team_stats_map, sourcing)
 
-        # Recalculate total_cat_rank
-        for player_list in [waiver_players, free_agents]:
-            for player in player_list:
-                total_rank = 0
-                for cat in all_scoring_categories:
-                    rank_key = f"{cat}_cat_rank"
-                    rank_value = player.get(rank_key)
-                    if rank_value is not None:
-                        if cat in unchecked_categories:
-                            total_rank += rank_value / 2.0
-                        else:
-                            total_rank += rank_value
-                player['total_cat_rank'] = round(total_rank, 2)
+        # total_cat_rank weights: unchecked categories count for half
+        unchecked_set = set(unchecked_categories)
+        rank_weights = [
+            (f"{cat}_cat_rank", 0.5 if cat in unchecked_set else 1.0)
+            for cat in all_scoring_categories
+        ]
+
+        # Rank both pools in one pass so the week and schedule lookups run once per request
+        waiver_id_set = set(waiver_player_ids)
+        free_agent_id_set = set(free_agent_ids)
+        available_players = _get_ranked_players(cursor, list(waiver_id_set | free_agent_id_set), all_cat_rank_columns, raw_stat_columns, target_week, team_stats_map, sourcing, rank_weights)
+        waiver_players = [p for p in available_players if p['player_id'] in waiver_id_set]
+        free_agents = [p for p in available_players if p['player_id'] in free_agent_id_set]
 
         # Calculate Unused Roster Spots
         unused_roster_spots = None
@@ -3305,14 +3271,16 @@ def get_free_agent_data():
                 cursor.execute("SELECT start_date, end_date FROM weeks WHERE week_num = ?", (target_week,))
                 week_dates = cursor.fetchone()
                 if week_dates:
-                    start_date_obj = datetime.strptime(week_dates['start_date'], '%Y-%m-%d').date()
-                    end_date_obj = datetime.strptime(week_dates['end_date'], '%Y-%m-%d').date()
+                    start_date_obj = date.fromisoformat(week_dates['start_date'])
+                    end_date_obj = date.fromisoformat(week_dates['end_date'])
                     days_in_week = [(start_date_obj + timedelta(days=i)) for i in range((end_date_obj - start_date_obj).days + 1)]
 
-                    today_obj = date.today()
+                    # ISO date strings sort chronologically, so compare them directly
+                    today_str = date.today().isoformat()
                     for day in days_in_week:
-                        if day >= today_obj:
-                            days_in_week_data.append(day.isoformat())
+                        day_str = day.isoformat()
+                        if day_str >= today_str:
+                            days_in_week_data.append(day_str)
 
                     cursor.execute("SELECT position, position_count FROM lineup_settings WHERE position NOT IN ('BN', 'IR', 'IR+')")
                     lineup_settings = {row['position']: row['position_count'] for row in cursor.fetchall()}
@@ -3322,7 +3290,7 @@ def get_free_agent_data():
 
                     unused_roster_spots = _calculate_unused_spots(days_in_week, team_ranked_roster, lineup_settings, simulated_moves)
 
-        return jsonify({
+        return _json_response({
             'waiver_players': waiver_players,
             'free_agents': free_agents,
             'scoring_categories': all_scoring_categories,
@@ -3331,7 +3299,7 @@ def get_free_agent_data():
             'ranked_categories': all_scoring_categories,
             'checked_categories': checked_categories,
             'unused_roster_spots': unused_roster_spots,
-            'team_roster': [dict(p) for p in team_ranked_roster],
+            'team_roster': team_ranked_roster,
             'week_dates': days_in_week_data
         })
 
@@ -3344,30 +3312,12 @@ def get_free_agent_data():
 
 
 def _get_team_goalie_stats(cursor, team_id, start_date_str, end_date_str):
-    # 1. Get Aggregated Live Stats
     goalie_categories = ['W', 'L', 'GA', 'SV', 'SA', 'SHO', 'TOI/G']
 
+    # One pass over the team's goalie rows feeds both the aggregated live stats
+    # and the individual starts. LEFT JOIN keeps rows without a players match in
+    # the totals, as the separate SUM query used to.
     cursor.execute(f"""
-        SELECT category, SUM(stat_value) as total
-        FROM daily_player_stats
-        WHERE date_ >= ? AND date_ <= ? AND team_id = ?
-        AND category IN ({','.join('?' for _ in goalie_categories)})
-        GROUP BY category
-    """, (start_date_str, end_date_str, team_id, *goalie_categories))
-
-    live_stats_raw = cursor.fetchall()
-    live_stats_decoded = decode_dict_values([dict(row) for row in live_stats_raw])
-
-    live_stats = {cat: 0 for cat in goalie_categories}
-    for row in live_stats_decoded:
-        if row['category'] in live_stats:
-            live_stats[row['category']] = row.get('total', 0)
-
-    if 'SHO' in live_stats and live_stats['SHO'] > 0:
-        live_stats['TOI/G'] += (live_stats['SHO'] * 60)
-
-    # 2. Get Individual Goalie Starts
-    cursor.execute("""
         SELECT
             d.player_id,
             p.player_name,
@@ -3375,18 +3325,29 @@ def _get_team_goalie_stats(cursor, team_id, start_date_str, end_date_str):
             d.category,
             d.stat_value
         FROM daily_player_stats d
-        JOIN players p ON d.player_id = p.player_id
+        LEFT JOIN players p ON d.player_id = p.player_id
         WHERE d.team_id = ? AND d.date_ >= ? AND d.date_ <= ?
-        AND d.category IN ('W', 'L', 'GA', 'SV', 'SA', 'SHO', 'TOI/G')
+        AND d.category IN ({','.join('?' for _ in goalie_categories)})
         ORDER BY d.date_, p.player_name
-    """, (team_id, start_date_str, end_date_str))
-
-    raw_starts = cursor.fetchall()
+    """, (team_id, start_date_str, end_date_str, *goalie_categories))
 
+    live_stats = {cat: 0 for cat in goalie_categories}
     starts_data = defaultdict(lambda: defaultdict(float))
-    for row in raw_starts:
-        key = (row['player_id'], row['player_name'], row['date_'])
-        starts_data[key][row['category']] = row['stat_value']
+    for row in cursor.fetchall():
+        category = row['category']
+        stat_value = row['stat_value']
+
+        # 1. Aggregate Live Stats
+        if stat_value is not None:
+            live_stats[category] += stat_value
+
+        # 2. Individual Goalie Starts
+        if row['player_name'] is not None:
+            key = (row['player_id'], row['player_name'], row['date_'])
+            starts_data[key][category] = stat_value
+
+    if 'SHO' in live_stats and live_stats['SHO'] > 0:
+        live_stats['TOI/G'] += (live_stats['SHO'] * 60)
 
     individual_starts = []
     for (player_id, player_name, date_), stats in starts_data.items():
@@ -15,17 +15,18 @@ Date: 10/31/2025
 """
 
 import pandas as pd
+import numpy as np
 import sqlite3
 import sys
 import os
 import re
-import csv
 import json
 import requests
-import time
 import unicodedata
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from datetime import date, timedelta
-from collections import defaultdict, Counter
 
 # --- Constants ---
 MOUNT_PATH = "/var/data/dbs" # Define the persistent storage path
@@ -41,10 +42,14 @@ PROJ2_GOALIE_FILE = os.path.join(SEED_DATA_DIR, 'proj2g.csv')
 DB_FILE = os.path.join(MOUNT_PATH, 'projections.db')
 YAHOO_DB_FILE = os.path.join(MOUNT_PATH, 'yahoo_player_ids.db')
 YAHOO_TABLE_NAME = 'players'
+SCHEDULE_CACHE_DIR = os.path.join(MOUNT_PATH, 'schedule_cache')
+PROJECTIONS_PARQUET_FILE = os.path.join(MOUNT_PATH, 'projections.parquet')
 
 START_DATE = date(2025, 10, 7)
 END_DATE = date(2026, 4, 17)
 NHL_TEAM_COUNT = 32
+SCHEDULE_EPOCH = date(1970, 1, 1) # Day zero for the packed team_schedules dates
+SCHEDULE_FETCH_WORKERS = 4 # Concurrent weekly schedule requests to the NHL API
 
 TEAM_TRICODES = [
     "ANA", "BOS", "BUF", "CGY", "CAR", "CHI", "COL", "CBJ", "DAL",
@@ -66,6 +71,64 @@ TEAM_TRICODE_MAP = {
     "WAS": "WSH"
 }
 
+# Category rank percentile buckets: a percentile <= CATEGORY_RANK_EDGES[i]
+# scores CATEGORY_RANK_POINTS[i] points, anything above the last edge scores 20
+CATEGORY_RANK_EDGES = np.array([0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50, 0.75])
+CATEGORY_RANK_POINTS = np.array([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 15, 20])
+
+# Mapping from CSV header names to the abbreviations used in the app
+STAT_MAPPING = {
+    'goals': 'G',
+    'g':'G',
+    'assists': 'A',
+    'a':'A',
+    'points': 'P',
+    'p':'P',
+    'pp_points': 'PPP',
+    'ppp':'PPP',
+    'hits': 'HIT',
+    'hit':'HIT',
+    'sog': 'SOG',
+    'blk': 'BLK',
+    'w': 'W',
+    'so': 'SHO',
+    'sho':'SHO',
+    'sv%': 'SVpct',
+    'svpct': 'SVpct', # Added for consistency
+    'ga': 'GA',
+    'plus_minus': 'plus_minus',
+    'shg': 'SHG',
+    'sha': 'SHA',
+    'shp': 'SHP',
+    'pim': 'PIM',
+    'fow': 'FOW',
+    'fol': 'FOL',
+    'ppg': 'PPG',
+    'ppa': 'PPA',
+    'gaa': 'GAA',
+    'gs': 'GS',
+    'sv': 'SV',
+    'sa': 'SA',
+    'qs': 'QS',
+    'l':'L'
+}
+
+# Characters stripped from sanitized CSV headers and normalized player names
+HEADER_CLEAN_RE = re.compile(r'[^a-z0-9_%]')
+NAME_CLEAN_RE = re.compile(r'[^a-z0-9]')
+
+# Lowercased CSV headers that are player info rather than per-game stats
+SKATER_STATS_TO_EXCLUDE = frozenset([
+    'player name', 'age', 'positions', 'team', 'salary', 'gp org', 'gp',
+    'toi org es', 'toi org pp', 'toi org pk', 'toi es', 'toi pp', 'toi pk',
+    'total toi', 'rank', 'playerid', 'fantasy team'
+])
+# --- FIX: Removed 'ga' so it gets processed as a per-game stat ---
+GOALIE_STATS_TO_EXCLUDE = frozenset([
+    'player name', 'team', 'age', 'position', 'salary', 'gs', 'sv%', 'gaa',
+    'rank', 'playerid', 'fantasy team'
+])
+
 
 # --- Function Definitions ---
 
@@ -76,7 +139,10 @@ def setup_database_connection(db_file):
     """
     print(f"Setting up database connection to {db_file}...")
     try:
-        conn = sqlite3.connect(db_file)
+        # Autocommit mode: run() opens one explicit transaction for the whole
+        # pipeline instead of the driver's implicit per-statement ones. The
+        # larger statement cache keeps the INSERTs prepared across the DDL.
+        conn = sqlite3.connect(db_file, isolation_level=None, cached_statements=256)
         print("Database connection successful.")
         return conn
     except sqlite3.Error as e:
@@ -84,6 +150,21 @@ def setup_database_connection(db_file):
         return None
 
 
+def tune_sqlite(conn):
+    """
+    Applies bulk-load PRAGMAs to a connection: WAL journaling with NORMAL
+    sync (one fsync per checkpoint rather than per commit), in-memory temp
+    storage, a 64MB page cache and a 256MB memory map.
+    """
+    conn.executescript(
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA cache_size=-65536;"
+        "PRAGMA mmap_size=268435456;"
+    )
+
+
 def normalize_name(name):
     """
     Normalizes a player name by converting to lowercase, removing diacritics,
@@ -91,95 +172,111 @@ def normalize_name(name):
     """
     if not name:
         return ""
-    # NFD form separates combined characters into base characters and diacritics
-    nfkd_form = unicodedata.normalize('NFKD', name.lower())
-    # Keep only ASCII characters
-    ascii_name = "".join([c for c in nfkd_form if not unicodedata.combining(c)])
+    lower_name = name.lower()
+    # Most names are plain ASCII already and have no diacritics to strip
+    if lower_name.isascii():
+        return NAME_CLEAN_RE.sub('', lower_name)
+    # NFKD form separates combined characters into base characters and diacritics;
+    # dropping non-ASCII then removes the diacritics (see normalize_name_series)
+    ascii_name = unicodedata.normalize('NFKD', lower_name).encode('ascii', 'ignore').decode('ascii')
     # Remove all non-alphanumeric characters (keeps letters and numbers)
-    return re.sub(r'[^a-z0-9]', '', ascii_name)
+    return NAME_CLEAN_RE.sub('', ascii_name)
+
+
+def normalize_name_series(names):
+    """
+    Vectorized normalize_name for a whole Series of player names. Dropping
+    non-ASCII after NFKD leaves the same [a-z0-9] characters as dropping
+    combining marks does, since the regex removes everything else anyway.
+    """
+    return (
+        names.str.lower()
+        .str.normalize('NFKD')
+        .str.encode('ascii', 'ignore')
+        .str.decode('ascii')
+        .str.replace(NAME_CLEAN_RE, '', regex=True)
+        .fillna('')
+    )
 
 
 def sanitize_header(header_list):
     """Sanitizes a list of header strings for SQL compatibility."""
     sanitized = []
 
-    # Mapping from CSV header names to the abbreviations used in the app
-    stat_mapping = {
-        'goals': 'G',
-        'g':'G',
-        'assists': 'A',
-        'a':'A',
-        'points': 'P',
-        'p':'P',
-        'pp_points': 'PPP',
-        'ppp':'PPP',
-        'hits': 'HIT',
-        'hit':'HIT',
-        'sog': 'SOG',
-        'blk': 'BLK',
-        'w': 'W',
-        'so': 'SHO',
-        'sho':'SHO',
-        'sv%': 'SVpct',
-        'svpct': 'SVpct', # Added for consistency
-        'ga': 'GA',
-        'plus_minus': 'plus_minus',
-        'shg': 'SHG',
-        'sha': 'SHA',
-        'shp': 'SHP',
-        'pim': 'PIM',
-        'fow': 'FOW',
-        'fol': 'FOL',
-        'ppg': 'PPG',
-        'ppa': 'PPA',
-        'gaa': 'GAA',
-        'gs': 'GS',
-        'sv': 'SV',
-        'sa': 'SA',
-        'qs': 'QS',
-        'l':'L'
-    }
-
     for h in header_list:
         clean_h = h.strip().lower()
         if clean_h == '"+/-"':
             clean_h = 'plus_minus'
         else:
-            clean_h = re.sub(r'[^a-z0-9_%]', '', clean_h.replace(' ', '_'))
+            clean_h = HEADER_CLEAN_RE.sub('', clean_h.replace(' ', '_'))
 
-        sanitized.append(stat_mapping.get(clean_h, clean_h))
+        sanitized.append(STAT_MAPPING.get(clean_h, clean_h))
 
     return sanitized
 
 
-def calculate_per_game_stats(row, gp_index, stat_indices):
+def calculate_per_game_stats(df, gp_index, stat_indices):
     """
-    Takes a players total projected stat for a column, and converts it to a
-    per game figure by dividing it by expected games played.
+    Takes each player's total projected stat for the given columns, and converts
+    it to a per game figure by dividing it by expected games played.
+    Operates on whole DataFrame columns at once.
     """
-    try:
-        # Get the number of games played, default to 0 if it's not a valid number
-        games_played = float(row[gp_index])
-    except (ValueError, IndexError):
-        games_played = 0.0
-
-    # If games played is 0, we can't divide. All per-game stats will be 0.
-    if games_played == 0:
-        for i in stat_indices:
-            if i < len(row):
-                row[i] = 0.0
-        return row
-
-    # Loop through the stat columns and calculate the per-game average
+    # Get the number of games played, default to 0 if it's not a valid number
+    games_played = pd.to_numeric(df[gp_index], errors='coerce').fillna(0.0)
+    has_games = games_played != 0
+
     for i in stat_indices:
-        if i < len(row):
-            try:
-                stat_value = float(row[i])
-                row[i] = round(stat_value / games_played, 4) # Calculate and round to 4 decimal places
-            except (ValueError, IndexError, TypeError):
-                # If the stat itself isn't a valid number, just set it to 0
-                row[i] = 0.0
-    return row
+        stat_values = pd.to_numeric(df[i], errors='coerce')
+        # Calculate and round to 4 decimal places. If games played is 0, or the
+        # stat itself isn't a valid number, the per-game value is 0.
+        # Python's round() is kept on purpose: numpy's rounding can differ in the
+        # last digit (e.g. 2.89375 -> 2.8938 instead of 2.8937).
+        per_game = (stat_values / games_played.where(has_games)).map(lambda v: round(v, 4))
+        df[i] = per_game.where(has_games & stat_values.notna(), 0.0)
+    return df
+
+
+def read_projection_csv(csv_file):
+    """
+    Reads a projection CSV with every cell as a string (matching csv.reader).
+    Columns are addressed by position so duplicate or blank headers survive.
+    Returns (raw_headers, data_df).
+    """
+    raw = pd.read_csv(csv_file, header=None, dtype=str, na_filter=False, encoding='utf-8-sig')
+    header_raw = raw.iloc[0].tolist()
+    return header_raw, raw.iloc[1:].reset_index(drop=True)
+
+
+def projection_rows_to_records(df, headers_sanitized, p_name_idx):
+    """
+    Converts a processed projection DataFrame into per-player dicts keyed by
+    sanitized header, standardizing team codes and adding the normalized name.
+    """
+    # Later duplicates of a sanitized header win, as in the old per-row dict build
+    columns = {h: i for i, h in enumerate(headers_sanitized)}
+    named_df = df[list(columns.values())].set_axis(list(columns), axis=1)
+
+    # --- TEAM FIX ---
+    if 'team' in named_df:
+        team_abbr = named_df['team'].str.upper() # Get uppercase version
+        named_df['team'] = team_abbr.map(TEAM_TRICODE_MAP).fillna(team_abbr) # Fix "TB" -> "TBL", "ana" -> "ANA"
+    else:
+        named_df['team'] = ''
+    # --- END FIX ---
+
+    named_df['player_name_normalized'] = normalize_name_series(df[p_name_idx])
+    return named_df.to_dict('records')
+
+
+def percentile_rank_points(percentiles):
+    """
+    Maps rank percentiles (rank / player count) to category rank points:
+    the top 5% get 1 point, each further 5% up to 50% adds a point, then
+    15 up to 75% and 20 for everyone else.
+    """
+    # searchsorted(side='left') finds the first edge >= percentile, i.e. the
+    # same bucket as a "percentile <= edge" ladder
+    return CATEGORY_RANK_POINTS[np.searchsorted(CATEGORY_RANK_EDGES, percentiles, side='left')]
 
 
 def calculate_and_add_category_ranks(player_data):
@@ -201,88 +298,82 @@ def calculate_and_add_category_ranks(player_data):
         'G', 'A', 'P', 'PPG', 'PPA', 'PPP', 'SHG', 'SHA', 'SHP',
         'HIT', 'BLK', 'PIM', 'FOW', 'SOG', 'plus_minus'
     ]
-    skaters = {name: data for name, data in player_data.items() if 'G' not in data.get('positions', '')}
-    num_skaters = len(skaters)
+    # Partition names once; the rank frames below read straight from player_data
+    skater_names = []
+    goalie_names = []
+    for name, data in player_data.items():
+        (goalie_names if 'G' in data.get('positions', '') else skater_names).append(name)
+
+    num_skaters = len(skater_names)
 
     if num_skaters > 0:
-        for stat in skater_stats_to_rank:
+        # One (players x stats) frame; non-numeric values count as 0
+        skater_df = pd.DataFrame(
+            [[player_data[name].get(stat, 0.0) for stat in skater_stats_to_rank] for name in skater_names],
+            index=skater_names, columns=skater_stats_to_rank
+        ).apply(pd.to_numeric, errors='coerce').fillna(0.0)
+
+        # .rank(method='first') breaks ties by file order, matching the old stable sort
+        skater_ranks = skater_df.rank(method='first', ascending=False)
+        rank_points = percentile_rank_points(skater_ranks.to_numpy() / num_skaters)
+
+        for j, stat in enumerate(skater_stats_to_rank):
             new_col_name = f"{stat}_cat_rank"
             new_rank_columns.append(new_col_name)
-
-            stat_values = []
-            for name, data in skaters.items():
-                try:
-                    value = float(data.get(stat, 0.0))
-                except (ValueError, TypeError):
-                    value = 0.0
-                stat_values.append((name, value))
-
-            stat_values.sort(key=lambda x: x[1], reverse=True)
-
-            for i, (name, value) in enumerate(stat_values):
-                percentile = (i + 1) / num_skaters
-                rank_points = 0
-                if percentile <= 0.05: rank_points = 1
-                elif percentile <= 0.10: rank_points = 2
-                elif percentile <= 0.15: rank_points = 3
-                elif percentile <= 0.20: rank_points = 4
-                elif percentile <= 0.25: rank_points = 5
-                elif percentile <= 0.30: rank_points = 6
-                elif percentile <= 0.35: rank_points = 7
-                elif percentile <= 0.40: rank_points = 8
-                elif percentile <= 0.45: rank_points = 9
-                elif percentile <= 0.50: rank_points = 10
-                elif percentile <= 0.75: rank_points = 15
-                else: rank_points = 20
-                player_data[name][new_col_name] = rank_points
+            for name, points in zip(skater_df.index, rank_points[:, j]):
+                player_data[name][new_col_name] = int(points)
 
     # --- Goalie Ranking ---
     goalie_stats_to_rank = {
         'GS': False, 'W': False, 'L': True, 'GA': True, 'SA': False,
         'SV': False, 'SVpct': False, 'GAA': True, 'SHO': False, 'QS': False
     }
-    goalies = {name: data for name, data in player_data.items() if 'G' in data.get('positions', '')}
-    num_goalies = len(goalies)
+    num_goalies = len(goalie_names)
 
     if num_goalies > 0:
+        goalie_df = pd.DataFrame(
+            [[player_data[name].get(stat, 0.0) for stat in goalie_stats_to_rank] for name in goalie_names],
+            index=goalie_names, columns=list(goalie_stats_to_rank)
+        ).apply(pd.to_numeric, errors='coerce').fillna(0.0)
+
         for stat, is_inverse in goalie_stats_to_rank.items():
             new_col_name = f"{stat}_cat_rank"
             new_rank_columns.append(new_col_name)
 
-            stat_values = []
-            for name, data in goalies.items():
-                try:
-                    value = float(data.get(stat, 0.0))
-                except (ValueError, TypeError):
-                    value = 0.0
-                stat_values.append((name, value))
-
-            stat_values.sort(key=lambda x: x[1], reverse=not is_inverse)
-
-            for i, (name, value) in enumerate(stat_values):
-                percentile = (i + 1) / num_goalies
-                rank_points = 0
-                if percentile <= 0.05: rank_points = 1
-                elif percentile <= 0.10: rank_points = 2
-                elif percentile <= 0.15: rank_points = 3
-                elif percentile <= 0.20: rank_points = 4
-                elif percentile <= 0.25: rank_points = 5
-                elif percentile <= 0.30: rank_points = 6
-                elif percentile <= 0.35: rank_points = 7
-                elif percentile <= 0.40: rank_points = 8
-                elif percentile <= 0.45: rank_points = 9
-                elif percentile <= 0.50: rank_points = 10
-                elif percentile <= 0.75: rank_points = 15
-                else: rank_points = 20
-                player_data[name][new_col_name] = rank_points
+            # 'ascending=is_inverse' ranks the lowest value first for inverse stats (GAA, L, GA)
+            goalie_ranks = goalie_df[stat].rank(method='first', ascending=is_inverse)
+            rank_points = percentile_rank_points(goalie_ranks.to_numpy() / num_goalies)
+            for name, points in zip(goalie_df.index, rank_points):
+                player_data[name][new_col_name] = int(points)
 
     return player_data, new_rank_columns
 
 
+def coerce_numeric(series):
+    """pd.to_numeric(errors='coerce'), skipping columns that are already numeric."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    return pd.to_numeric(series, errors='coerce')
+
+
+def apply_real_affinity(series):
+    """
+    Converts a column the way SQLite's REAL affinity stores it: values that
+    look numeric become floats, anything else (e.g. team codes) stays as-is.
+    """
+    numeric = pd.to_numeric(series, errors='coerce')
+    if numeric.notna().sum() == series.notna().sum():
+        return numeric.astype(float)
+    # Mixed column: read back as objects, with NULLs coming back as NaN
+    return series.where(numeric.isna(), numeric).where(series.notna(), np.nan)
+
+
 def process_separate_files_to_table(cursor, skater_csv_file, goalie_csv_file, target_table_name):
     """
     Reads a SEPARATE skater and goalie CSV, combines them in memory,
     calculates ranks, and saves to a single table.
+
+    Returns the table's contents as a DataFrame, as SELECT * would read them.
     """
     print(f"\n--- Setting up Table from SEPARATE Files: '{target_table_name}' ---")
     try:
@@ -293,91 +384,52 @@ def process_separate_files_to_table(cursor, skater_csv_file, goalie_csv_file, ta
 
         # Process Skater File
         print(f"Processing Skater File: {skater_csv_file}")
-        with open(skater_csv_file, 'r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
-            header_raw = next(reader)
-            header_lower = [h.strip().lower() for h in header_raw]
-            skater_headers_sanitized = sanitize_header(header_raw)
-
-            try:
-                p_name_idx = header_lower.index('player name')
-                gp_idx = header_lower.index('gp')
-                pos_idx = header_lower.index('positions')
-            except ValueError as e:
-                raise ValueError(f"Missing column in {skater_csv_file}: {e}")
-
-            skater_stats_to_exclude = ['player name', 'age', 'positions', 'team', 'salary', 'gp org', 'gp', 'toi org es', 'toi org pp', 'toi org pk', 'toi es', 'toi pp', 'toi pk', 'total toi', 'rank', 'playerid', 'fantasy team']
-            skater_stat_indices = [i for i, h in enumerate(header_lower) if h not in skater_stats_to_exclude and h.strip() != '']
-
-            for row in reader:
-                # Skip goalies if any are in this file
-                if not row or (pos_idx < len(row) and 'G' in row[pos_idx]):
-                    continue
-                calculate_per_game_stats(row, gp_idx, skater_stat_indices)
-                player_name = row[p_name_idx]
-                if not player_name: continue
-                player_name_normalized = normalize_name(player_name)
-
-                data_dict = {skater_headers_sanitized[i]: val for i, val in enumerate(row)}
-
-                # --- TEAM FIX ---
-                team_abbr = data_dict.get('team', '').upper() # Get uppercase version
-                if team_abbr in TEAM_TRICODE_MAP:
-                    data_dict['team'] = TEAM_TRICODE_MAP[team_abbr] # Fix "TB" -> "TBL"
-                else:
-                    data_dict['team'] = team_abbr # Standardize "ana" -> "ANA"
-                # --- END FIX ---
-
-                player_data[player_name_normalized] = data_dict
-                player_data[player_name_normalized]['player_name_normalized'] = player_name_normalized
+        header_raw, skater_df = read_projection_csv(skater_csv_file)
+        header_lower = [h.strip().lower() for h in header_raw]
+        skater_headers_sanitized = sanitize_header(header_raw)
+
+        try:
+            p_name_idx = header_lower.index('player name')
+            gp_idx = header_lower.index('gp')
+            pos_idx = header_lower.index('positions')
+        except ValueError as e:
+            raise ValueError(f"Missing column in {skater_csv_file}: {e}")
+
+        skater_stat_indices = [i for i, h in enumerate(header_lower) if h not in SKATER_STATS_TO_EXCLUDE and h.strip() != '']
+
+        # Skip goalies if any are in this file, and rows without a player name
+        keep_mask = ~skater_df[pos_idx].str.contains('G', regex=False) & (skater_df[p_name_idx] != '')
+        skater_df = calculate_per_game_stats(skater_df[keep_mask].copy(), gp_idx, skater_stat_indices)
+
+        for data_dict in projection_rows_to_records(skater_df, skater_headers_sanitized, p_name_idx):
+            player_data[data_dict['player_name_normalized']] = data_dict
 
         # Process Goalie File
         print(f"Processing Goalie File: {goalie_csv_file}")
-        with open(goalie_csv_file, 'r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
-            header_raw = next(reader)
-            header_lower = [h.strip().lower() for h in header_raw]
-            goalie_headers_sanitized = sanitize_header(header_raw)
-
-            try:
-                p_name_idx = header_lower.index('player name')
-                gp_goalie_idx = header_lower.index('gs')
-            except ValueError as e:
-                raise ValueError(f"Missing column in {goalie_csv_file}: {e}")
-
-            # --- FIX: Removed 'ga' so it gets processed as a per-game stat ---
-            goalie_stats_to_exclude = ['player name', 'team', 'age', 'position', 'salary', 'gs', 'sv%', 'gaa', 'rank', 'playerid', 'fantasy team']
-            # --- END FIX ---
-
-            goalie_stat_indices = [i for i, h in enumerate(header_lower) if h not in goalie_stats_to_exclude and h.strip() != '']
-
-            for row in reader:
-                if not row: continue
-                # This will now process GA / GS just like W / GS
-                calculate_per_game_stats(row, gp_goalie_idx, goalie_stat_indices)
-
-                player_name = row[p_name_idx]
-                if not player_name: continue
-                player_name_normalized = normalize_name(player_name)
-
-                goalie_row_data = {goalie_headers_sanitized[i]: val for i, val in enumerate(row)}
-
-                # --- TEAM FIX ---
-                team_abbr = goalie_row_data.get('team', '').upper() # Get uppercase version
-                if team_abbr in TEAM_TRICODE_MAP:
-                    goalie_row_data['team'] = TEAM_TRICODE_MAP[team_abbr] # Fix "TB" -> "TBL"
-                else:
-                    goalie_row_data['team'] = team_abbr # Standardize "ana" -> "ANA"
-                # --- END FIX ---
-
-                if 'positions' not in goalie_row_data or not goalie_row_data['positions']:
-                    goalie_row_data['positions'] = 'G'
-
-                if player_name_normalized in player_data:
-                    player_data[player_name_normalized].update(goalie_row_data)
-                else:
-                    goalie_row_data['player_name_normalized'] = player_name_normalized
-                    player_data[player_name_normalized] = goalie_row_data
+        header_raw, goalie_df = read_projection_csv(goalie_csv_file)
+        header_lower = [h.strip().lower() for h in header_raw]
+        goalie_headers_sanitized = sanitize_header(header_raw)
+
+        try:
+            p_name_idx = header_lower.index('player name')
+            gp_goalie_idx = header_lower.index('gs')
+        except ValueError as e:
+            raise ValueError(f"Missing column in {goalie_csv_file}: {e}")
+
+        goalie_stat_indices = [i for i, h in enumerate(header_lower) if h not in GOALIE_STATS_TO_EXCLUDE and h.strip() != '']
+
+        # This will now process GA / GS just like W / GS
+        goalie_df = calculate_per_game_stats(goalie_df[goalie_df[p_name_idx] != ''].copy(), gp_goalie_idx, goalie_stat_indices)
+
+        for goalie_row_data in projection_rows_to_records(goalie_df, goalie_headers_sanitized, p_name_idx):
+            if 'positions' not in goalie_row_data or not goalie_row_data['positions']:
+                goalie_row_data['positions'] = 'G'
+
+            player_name_normalized = goalie_row_data['player_name_normalized']
+            if player_name_normalized in player_data:
+                player_data[player_name_normalized].update(goalie_row_data)
+            else:
+                player_data[player_name_normalized] = goalie_row_data
 
         print(f"Processed data for {len(player_data)} unique players from both files.")
 
@@ -387,7 +439,10 @@ def process_separate_files_to_table(cursor, skater_csv_file, goalie_csv_file, ta
         print(f"Added {len(new_rank_columns)} category rank columns.")
 
         # Part 3: Define schema from all headers (original + new) and create the table
-        all_headers = list(dict.fromkeys(skater_headers_sanitized + goalie_headers_sanitized))
+        # Order-preserving union: skater headers first, then goalie-only headers
+        all_headers = pd.Index(skater_headers_sanitized).drop_duplicates().union(
+            pd.Index(goalie_headers_sanitized).drop_duplicates(), sort=False
+        )
         final_headers = [h for h in all_headers if h] # Remove any empty headers
         final_headers.extend(new_rank_columns)  # Add new rank columns to the final list of headers
 
@@ -409,16 +464,31 @@ def process_separate_files_to_table(cursor, skater_csv_file, goalie_csv_file, ta
         # Part 4: Insert the combined and augmented data into the database
         insert_headers = final_headers + ['player_name_normalized']
         placeholders = ", ".join(['?'] * len(insert_headers))
-        insert_sql = f'INSERT OR REPLACE INTO {target_table_name} ({", ".join(f"`{h}`" for h in insert_headers)}) VALUES ({placeholders})'
+        # Plain INSERT: the table was just dropped and re-created, so there is
+        # nothing for OR REPLACE to collide with.
+        insert_sql = f'INSERT INTO {target_table_name} ({", ".join(f"`{h}`" for h in insert_headers)}) VALUES ({placeholders})'
 
-        rows_to_insert = []
-        for player_name_normalized, data_dict in player_data.items():
-            ordered_row = tuple(data_dict.get(h, None) for h in insert_headers)
-            rows_to_insert.append(ordered_row)
+        # One object-dtype frame in insert column order, so the values stay the
+        # plain Python objects sqlite3 can bind; missing stats become None (NULL)
+        insert_df = pd.DataFrame(list(player_data.values()), columns=insert_headers, dtype=object)
+        insert_df = insert_df.where(insert_df.notna(), None)
+        rows_to_insert = list(insert_df.itertuples(index=False, name=None))
 
         cursor.executemany(insert_sql, rows_to_insert)
         print(f"Populated '{target_table_name}' table with {len(rows_to_insert)} rows.")
 
+        # Part 5: Hand the same data back as a DataFrame in table column order,
+        # typed the way the REAL columns store it, so the averaging step doesn't
+        # have to read the table straight back out of SQLite
+        table_columns = ['player_name', 'positions'] + \
+            [c for c in final_headers if c not in ['player_name', 'positions']] + ['player_name_normalized']
+        insert_df = insert_df.loc[:, ~insert_df.columns.duplicated(keep='last')]
+        real_columns = set(table_columns[2:-1])
+        return pd.DataFrame({
+            col: apply_real_affinity(insert_df[col]) if col in real_columns else insert_df[col]
+            for col in table_columns
+        })
+
     except FileNotFoundError as e:
         print(f"ERROR: A required CSV file was not found: {e.filename}", file=sys.stderr)
         raise
@@ -430,20 +500,20 @@ def process_separate_files_to_table(cursor, skater_csv_file, goalie_csv_file, ta
         raise
 
 
-def create_averaged_projections(conn, cursor):
+def create_averaged_projections(conn, cursor, df1, df2):
     """
-    Combines 'proj1' and 'proj2' tables into a final 'projections' table.
+    Combines the 'proj1' and 'proj2' data (as returned by
+    process_separate_files_to_table) into a final 'projections' table.
     It averages shared stats and coalesces player info.
     """
     print("\n--- Creating Final Averaged Projections Table ---")
     try:
-        # Load tables into pandas DataFrames
-        df1 = pd.read_sql_query("SELECT * FROM proj1", conn)
-        df2 = pd.read_sql_query("SELECT * FROM proj2", conn)
-        print(f"Loaded {len(df1)} rows from proj1 and {len(df2)} rows from proj2.")
+        print(f"Using {len(df1)} rows from proj1 and {len(df2)} rows from proj2.")
 
-        # Merge on player_name_normalized using an outer join to keep all players
-        merged_df = pd.merge(df1, df2, on='player_name_normalized', how='outer', suffixes=('_p1', '_p2'))
+        # Outer join on the player_name_normalized index to keep all players
+        merged_df = df1.set_index('player_name_normalized').join(
+            df2.set_index('player_name_normalized'), how='outer', lsuffix='_p1', rsuffix='_p2'
+        ).reset_index()
         print(f"Total unique players after merge: {len(merged_df)}")
 
         # Define columns for coalescing (info) vs. averaging (stats)
@@ -506,35 +576,27 @@ def create_averaged_projections(conn, cursor):
 
         # 2. Handle STAT_COLS (Average, or carry over if unique)
         print(f"Averaging {len(all_stat_cols)} stat columns...")
-        for col in all_stat_cols:
-            col_p1_name = f'{col}_p1'
-            col_p2_name = f'{col}_p2'
-
-            in_p1 = col_p1_name in merged_df.columns
-            in_p2 = col_p2_name in merged_df.columns
-
-            if in_p1 and in_p2:
-                # Stat is in BOTH tables: average them
-                # .mean(axis=1) gracefully handles if one value is NaN (it just returns the other)
-                col1 = pd.to_numeric(merged_df[col_p1_name], errors='coerce')
-                col2 = pd.to_numeric(merged_df[col_p2_name], errors='coerce')
-                final_df[col] = pd.concat([col1, col2], axis=1).mean(axis=1)
-            elif in_p1:
-                # Stat is ONLY in proj1: carry it over
-                final_df[col] = pd.to_numeric(merged_df[col_p1_name], errors='coerce')
-            elif in_p2:
-                # Stat is ONLY in proj2: carry it over
-                final_df[col] = pd.to_numeric(merged_df[col_p2_name], errors='coerce')
+        stat_order = [col for col in all_stat_cols
+                      if f'{col}_p1' in merged_df.columns or f'{col}_p2' in merged_df.columns]
+        p1_cols = [col for col in stat_order if f'{col}_p1' in merged_df.columns]
+        p2_cols = [col for col in stat_order if f'{col}_p2' in merged_df.columns]
+
+        # Convert each side's stat block to numeric once, keyed by the bare stat name
+        stats_p1 = merged_df[[f'{col}_p1' for col in p1_cols]].apply(coerce_numeric)
+        stats_p1.columns = p1_cols
+        stats_p2 = merged_df[[f'{col}_p2' for col in p2_cols]].apply(coerce_numeric)
+        stats_p2.columns = p2_cols
+
+        # Average where both sides have a value, otherwise carry over whichever
+        # one exists (same result as a NaN-skipping row mean of the pair)
+        averaged = ((stats_p1 + stats_p2) / 2).combine_first(stats_p1).combine_first(stats_p2)
+        final_df = pd.concat([final_df, averaged[stat_order]], axis=1)
 
         # 3. Save the final averaged DataFrame to the 'projections' table
         print(f"Saving {len(final_df)} players to final 'projections' table...")
 
         # --- MODIFIED LINE: Added dtype parameter to force INTEGER type ---
-        final_df.to_sql('projections',
-                        conn,
-                        if_exists='replace',
-                        index=False,
-                        dtype={'nhlplayerid': 'INTEGER'})
+        write_dataframe_table(cursor, final_df, 'projections', dtype={'nhlplayerid': 'INTEGER'})
         # --- END MODIFICATION ---
 
         # Add an index on player_name_normalized for the new table
@@ -552,142 +614,225 @@ def create_averaged_projections(conn, cursor):
         raise
 
 
+def write_dataframe_table(cursor, df, table_name, dtype=None):
+    """
+    Replaces table_name with the contents of df, declaring the same column
+    types to_sql would. Unlike to_sql it doesn't commit, so the write stays
+    inside run()'s single transaction.
+    """
+    cursor.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+    cursor.execute(pd.io.sql.get_schema(df, table_name, con=cursor.connection, dtype=dtype))
+    placeholders = ", ".join(['?'] * len(df.columns))
+    # Object dtype hands sqlite3 plain Python values; NaN/NA become NULL
+    rows = df.astype(object).where(df.notna(), None)
+    cursor.executemany(f'INSERT INTO "{table_name}" VALUES ({placeholders})',
+                       rows.itertuples(index=False, name=None))
+
+
 def join_yahoo_ids(conn, cursor):
     """
     Joins the final 'projections' table with Yahoo player IDs and positions
     from an external DB. This will OVERWRITE the 'positions' column.
 
     It also creates a 'missing_id' table for any players who did not match.
+    The join runs entirely in SQLite, so 'projections' is never read back
+    into pandas.
     """
     print("\n--- Joining Yahoo Player ID Data ---")
     try:
-        # 1. Load the newly created 'projections' table
-        df_proj = pd.read_sql_query("SELECT * FROM projections", conn)
-
-        # 2. Attach the Yahoo DB and load the required columns
+        # 1. Attach the Yahoo DB
         print(f"Attaching Yahoo DB: {YAHOO_DB_FILE}")
         cursor.execute(f"ATTACH DATABASE '{YAHOO_DB_FILE}' AS yahoo_db")
-
-        # Use 'player_name_normalized' from Yahoo DB
-        yahoo_query = f"SELECT player_name_normalized, player_id, positions,status FROM yahoo_db.{YAHOO_TABLE_NAME}"
-        df_yahoo = pd.read_sql_query(yahoo_query, conn)
-        print(f"Loaded {len(df_yahoo)} players from Yahoo DB.")
-
-        # 3. Drop the original 'positions' column from projections
-        if 'positions' in df_proj.columns:
-            df_proj = df_proj.drop(columns=['positions'])
-
-        # 4. Merge with the Yahoo data (left join)
-        #   Join on 'player_name_normalized'
-        df_final = pd.merge(df_proj, df_yahoo, on='player_name_normalized', how='left')
+        yahoo_count = cursor.execute(f"SELECT COUNT(*) FROM yahoo_db.{YAHOO_TABLE_NAME}").fetchone()[0]
+        print(f"Found {yahoo_count} players in Yahoo DB.")
+
+        # 2. Build the joined table's schema from the current one: every
+        #    projections column (with its declared type) except the original
+        #    'positions', followed by the Yahoo columns
+        proj_columns = [
+            (row[1], row[2]) for row in cursor.execute("PRAGMA table_info(projections)")
+            if row[1] != 'positions'
+        ]
+        yahoo_columns = [('player_id', 'INTEGER'), ('positions', 'TEXT'), ('status', 'TEXT')]
+        columns_def = ", ".join(f'"{name}" {col_type}' for name, col_type in proj_columns + yahoo_columns)
+        select_cols = ", ".join([f'p."{name}"' for name, _ in proj_columns] + [f'y.{name}' for name, _ in yahoo_columns])
+
+        # 3. Left join on 'player_name_normalized' into a new table and swap it in
+        cursor.execute("DROP TABLE IF EXISTS projections_joined")
+        cursor.execute(f"CREATE TABLE projections_joined ({columns_def})")
+        cursor.execute(f"""
+            INSERT INTO projections_joined
+            SELECT {select_cols}
+            FROM projections p
+            LEFT JOIN yahoo_db.{YAHOO_TABLE_NAME} y ON y.player_name_normalized = p.player_name_normalized
+        """)
+        cursor.execute("DROP TABLE projections")
+        cursor.execute("ALTER TABLE projections_joined RENAME TO projections")
+        joined_count = cursor.execute("SELECT COUNT(*) FROM projections").fetchone()[0]
+        print(f"Saved {joined_count} players to 'projections' table with Yahoo data.")
 
         # --- Create the missing_id table ---
-        # Find rows where the merge failed (player_id from Yahoo is null)
-        missing_mask = df_final['player_id'].isnull()
-        df_missing = df_final[missing_mask][['player_name', 'player_name_normalized', 'team']]
-
-        if not df_missing.empty:
-            print(f"WARNING: {len(df_missing)} players did not match a Yahoo ID.")
+        # Rows where the join failed (player_id from Yahoo is null)
+        cursor.execute("DROP TABLE IF EXISTS missing_id")
+        missing_count = cursor.execute("SELECT COUNT(*) FROM projections WHERE player_id IS NULL").fetchone()[0]
+        if missing_count:
+            print(f"WARNING: {missing_count} players did not match a Yahoo ID.")
             print(f"Saving these players to 'missing_id' table for review...")
-            df_missing.to_sql('missing_id', conn, if_exists='replace', index=False)
+            cursor.execute("CREATE TABLE missing_id (player_name TEXT, player_name_normalized TEXT, team TEXT)")
+            cursor.execute("""
+                INSERT INTO missing_id
+                SELECT player_name, player_name_normalized, team FROM projections WHERE player_id IS NULL
+            """)
         else:
             print("All players successfully matched with a Yahoo ID.")
-            # Ensure the table is empty if it existed before
-            cursor.execute("DROP TABLE IF EXISTS missing_id")
         # --- END NEW SECTION ---
 
-        # 5. Save the final DataFrame back to the 'projections' table
-        print(f"Saving {len(df_final)} players back to 'projections' table with Yahoo data...")
-        # --- MODIFIED LINE: Added dtype parameter AGAIN to ensure it persists ---
-        # This is redundant if join_yahoo_ids is called *after*
-        # create_averaged_projections, but it's safer to have it here too
-        # in case the column is re-inferred.
-
-        # Let's check the logic. join_yahoo_ids *replaces* the table again.
-        # The `df_final` here is created from `df_proj`, which was read *after*
-        # create_averaged_projections. `df_proj` should have the 'nhlplayerid'
-        # column. Let's ensure the type is correct *before* this final save.
-
-        if 'nhlplayerid' in df_final.columns:
-            # Re-apply the pandas Int64 type in case it was lost during the merge
-            df_final['nhlplayerid'] = pd.to_numeric(df_final['nhlplayerid'], errors='coerce').fillna(pd.NA).astype('Int64')
-
-        df_final.to_sql('projections',
-                        conn,
-                        if_exists='replace',
-                        index=False,
-                        dtype={'nhlplayerid': 'INTEGER', 'player_id': 'INTEGER'}) # Also fixing player_id from yahoo
-        # --- END MODIFICATION ---
-
-        # 6. Re-create the index
+        # 4. Re-create the index
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_normalized_name_projections ON projections(player_name_normalized)')
 
-        # 7. Detach the Yahoo DB
-        cursor.execute("DETACH DATABASE yahoo_db")
-        print("Successfully joined Yahoo data and detached DB.")
+        # yahoo_db stays attached until run() closes the connection: SQLite
+        # can't DETACH a database the still-open transaction has read from
+        print("Successfully joined Yahoo data.")
 
     except sqlite3.OperationalError as e:
         print(f"SQL Error: {e}", file=sys.stderr)
         print(f"Please ensure '{YAHOO_DB_FILE}' exists and contains a table named '{YAHOO_TABLE_NAME}'.", file=sys.stderr)
-        # Detach if attach was successful but query failed
-        try:
-            cursor.execute("DETACH DATABASE yahoo_db")
-        except:
-            pass
         raise
     except Exception as e:
         print(f"An error occurred during Yahoo join: {e}", file=sys.stderr)
-        try:
-            cursor.execute("DETACH DATABASE yahoo_db")
-        except:
-            pass
         raise
 
 
-def get_full_nhl_schedule(start_date, end_date):
-    """Fetches the entire season's NHL game schedule by iterating week by week."""
-    all_games = {} # Use a dictionary to store unique games to avoid duplicates
-    current_date = start_date
+def write_projections_parquet(conn):
+    """
+    Writes a columnar Parquet snapshot of the final 'projections' table next
+    to the DB for read-heavy analytics. pyarrow isn't a project requirement,
+    so this is skipped when it isn't installed.
+    """
+    try:
+        import pyarrow  # noqa: F401 -- pandas' Parquet engine
+    except ImportError:
+        print("pyarrow not installed; skipping Parquet snapshot of 'projections'.")
+        return
 
-    print(f"Fetching full 2025-2026 season schedule for all teams (week by week)...")
+    try:
+        df = pd.read_sql_query("SELECT * FROM projections", conn)
+        df.to_parquet(PROJECTIONS_PARQUET_FILE, compression='zstd', index=False)
+        print(f"Wrote Parquet snapshot of {len(df)} players to {PROJECTIONS_PARQUET_FILE}.")
+    except Exception as e:
+        # The snapshot is a convenience copy; never fail the DB build over it
+        print(f"Warning: could not write Parquet snapshot: {e}", file=sys.stderr)
 
-    while current_date <= end_date:
-        url = f"https://api-web.nhle.com/v1/schedule/{current_date.strftime('%Y-%m-%d')}"
-        print(f"Fetching schedule for week of {current_date.strftime('%Y-%m-%d')}...")
 
-        try:
-            response = requests.get(url, timeout=15)
+def fetch_schedule_week(session, week_start):
+    """
+    Fetches one week of the NHL schedule starting at week_start using the
+    shared requests session.
+    Returns a list of game dicts, or an empty list if the request fails.
+
+    Each week's response is cached in SCHEDULE_CACHE_DIR along with its
+    ETag/Last-Modified headers, and re-sent as a conditional GET so an
+    unchanged week comes back as a bodiless 304.
+    """
+    week_str = week_start.strftime('%Y-%m-%d')
+    url = f"https://api-web.nhle.com/v1/schedule/{week_str}"
+    cache_path = os.path.join(SCHEDULE_CACHE_DIR, f"schedule_{week_str}.json")
+    print(f"Fetching schedule for week of {week_str}...")
+
+    cached = None
+    try:
+        with open(cache_path, 'r') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        pass # No usable cache entry for this week
+
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    try:
+        response = session.get(url, headers=headers, timeout=15)
+        if response.status_code == 304 and cached:
+            data = cached['data']
+        else:
             response.raise_for_status()
             data = response.json()
+            if response.headers.get('ETag') or response.headers.get('Last-Modified'):
+                try:
+                    os.makedirs(SCHEDULE_CACHE_DIR, exist_ok=True)
+                    with open(cache_path, 'w') as f:
+                        json.dump({
+                            'etag': response.headers.get('ETag'),
+                            'last_modified': response.headers.get('Last-Modified'),
+                            'data': data
+                        }, f)
+                except OSError as e:
+                    print(f"Warning: could not cache schedule for week of {week_str}: {e}")
+    except requests.exceptions.RequestException as e:
+        print(f"\n❌ Error fetching schedule for week of {week_str}: {e}")
+        return []
+
+    week_games = []
+    for week_data in data.get('gameWeek', []):
+        game_date_str = week_data.get('date')
+        for game in week_data.get('games', []):
+            week_games.append({
+                'date': game_date_str,
+                'home_team': game.get('homeTeam', {}).get('abbrev'),
+                'away_team': game.get('awayTeam', {}).get('abbrev')
+            })
+    return week_games
 
-            for week_data in data.get('gameWeek', []):
-                game_date_str = week_data.get('date')
-                for game in week_data.get('games', []):
-                    home_team = game.get('homeTeam', {}).get('abbrev')
-                    away_team = game.get('awayTeam', {}).get('abbrev')
-                    # Create a unique key for each game to avoid duplicates
-                    game_key = f"{game_date_str}-{home_team}-{away_team}"
-
-                    if game_key not in all_games:
-                        all_games[game_key] = {
-                            'date': game_date_str,
-                            'home_team': home_team,
-                            'away_team': away_team
-                        }
-
-        except requests.exceptions.RequestException as e:
-            print(f"\n❌ Error fetching schedule for week of {current_date.strftime('%Y-%m-%d')}: {e}")
-            # Continue to the next week even if one week fails
-
-        # Move to the next week
+
+def get_full_nhl_schedule(start_date, end_date):
+    """Fetches the entire season's NHL game schedule, several weeks at a time."""
+    all_games = {} # Use a dictionary to store unique games to avoid duplicates
+
+    print(f"Fetching full 2025-2026 season schedule for all teams (week by week)...")
+
+    week_starts = []
+    current_date = start_date
+    while current_date <= end_date:
+        week_starts.append(current_date)
         current_date += timedelta(days=7)
-        time.sleep(0.1) # Be polite to the API server
+
+    # The requests are network-bound, so overlap them. A small pool keeps us
+    # polite to the API server; map() returns weeks in order, so the dedup
+    # below keeps the same first-seen game order as a serial fetch.
+    # One keep-alive session for every week, so the TLS handshake to the API
+    # is paid once per pooled connection rather than once per request
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=SCHEDULE_FETCH_WORKERS)
+        session.mount('https://', adapter)
+        with ThreadPoolExecutor(max_workers=SCHEDULE_FETCH_WORKERS) as executor:
+            weekly_games = list(executor.map(partial(fetch_schedule_week, session), week_starts))
+
+    for week_games in weekly_games:
+        for game in week_games:
+            # A (date, home, away) tuple uniquely identifies each game
+            all_games.setdefault((game['date'], game['home_team'], game['away_team']), game)
 
     game_list = list(all_games.values())
     print(f"\nSuccessfully fetched schedule data for {len(game_list)} unique games.")
     return game_list
 
 
+def insert_multi_values(cursor, table_name, rows):
+    """
+    Inserts a small list of same-width row tuples into table_name with a
+    single multi-row INSERT ... VALUES statement. Meant for lookup tables of
+    at most a few hundred rows (well under SQLite's bound-variable limit).
+    """
+    if not rows:
+        return
+    row_placeholder = f"({', '.join(['?'] * len(rows[0]))})"
+    sql = f"INSERT INTO {table_name} VALUES {', '.join([row_placeholder] * len(rows))}"
+    cursor.execute(sql, [value for row in rows for value in row])
+
+
 def setup_schedule_tables(cursor, games):
     """Creates and populates all schedule-related tables."""
     print("\n--- Setting up Schedule Tables ---")
@@ -698,27 +843,45 @@ def setup_schedule_tables(cursor, games):
     # 1. Schedule Table
     cursor.execute("DROP TABLE IF EXISTS schedule")
     cursor.execute("CREATE TABLE schedule (game_id INTEGER PRIMARY KEY, game_date TEXT, home_team TEXT, away_team TEXT)")
-    cursor.executemany("INSERT INTO schedule (game_date, home_team, away_team) VALUES (?, ?, ?)", [(g['date'], g['home_team'], g['away_team']) for g in games])
+    cursor.executemany("INSERT INTO schedule (game_date, home_team, away_team) VALUES (?, ?, ?)", ((g['date'], g['home_team'], g['away_team']) for g in games))
     print("Table 'schedule' created and populated.")
 
 
     # 3. Team Schedules Table
     cursor.execute("DROP TABLE IF EXISTS team_schedules")
-    cursor.execute("CREATE TABLE team_schedules (team_tricode TEXT PRIMARY KEY, schedule_json TEXT)")
-    schedules_by_team = defaultdict(list)
-    for game in games:
-        schedules_by_team[game['home_team']].append(game['date'])
-        schedules_by_team[game['away_team']].append(game['date'])
-    team_schedule_data = [(team, json.dumps(sorted(dates))) for team, dates in schedules_by_team.items()]
-    cursor.executemany("INSERT INTO team_schedules VALUES (?, ?)", team_schedule_data)
+    # schedule_days holds each team's sorted game dates packed as little-endian
+    # uint16 day counts since SCHEDULE_EPOCH; read back with
+    # np.frombuffer(blob, dtype='<u2')
+    # Lookup-only tables keyed by their TEXT primary key: WITHOUT ROWID keeps
+    # them in a single B-tree instead of a rowid table plus a key index
+    cursor.execute("CREATE TABLE team_schedules (team_tricode TEXT PRIMARY KEY, schedule_days BLOB) WITHOUT ROWID")
+    # One (team, day) entry per side of every game (home, away, home, ...),
+    # sorted by team then day, then split into each team's run of days
+    game_days = (np.array([g['date'] for g in games], dtype='datetime64[D]')
+                 - np.datetime64(SCHEDULE_EPOCH, 'D')).astype(np.int64)
+    teams = np.array([team for g in games for team in (g['home_team'], g['away_team'])])
+    team_days = np.repeat(game_days, 2)
+    if np.all(game_days[1:] >= game_days[:-1]):
+        # The API returns games in date order, so a stable sort on team alone
+        # already leaves each team's days ascending
+        order = np.argsort(teams, kind='stable')
+    else:
+        order = np.lexsort((team_days, teams))
+    teams, team_days = teams[order], team_days[order]
+    team_names, team_starts = np.unique(teams, return_index=True)
+    insert_multi_values(cursor, 'team_schedules', [
+        (team, days.astype('<u2').tobytes())
+        for team, days in zip(team_names.tolist(), np.split(team_days, team_starts[1:]))
+    ])
     print("Table 'team_schedules' created and populated.")
 
     # 4. Off Days Table
     cursor.execute("DROP TABLE IF EXISTS off_days")
-    cursor.execute("CREATE TABLE off_days (off_day_date TEXT PRIMARY KEY)")
-    games_per_day = Counter(g['date'] for g in games)
-    off_days = [(day,) for day, count in games_per_day.items() if count * 4 < NHL_TEAM_COUNT]
-    cursor.executemany("INSERT INTO off_days VALUES (?)", sorted(off_days))
+    cursor.execute("CREATE TABLE off_days (off_day_date TEXT PRIMARY KEY) WITHOUT ROWID")
+    # np.unique sorts the dates and counts games per day in one pass
+    game_days, games_per_day = np.unique([g['date'] for g in games], return_counts=True)
+    off_days = [(day,) for day in game_days[games_per_day * 4 < NHL_TEAM_COUNT].tolist()]
+    insert_multi_values(cursor, 'off_days', off_days)
     print(f"Table 'off_days' created and populated with {len(off_days)} dates.")
 
 
@@ -730,28 +893,40 @@ def run():
     """
     print("--- Starting Projection Database Creation ---")
     conn = None
+
+    # The schedule fetch is pure network I/O and nothing needs it until step 7,
+    # so start it now and let it overlap the projection work. The SQLite
+    # connection stays on this thread.
+    schedule_executor = ThreadPoolExecutor(max_workers=1)
+    schedule_future = schedule_executor.submit(get_full_nhl_schedule, START_DATE, END_DATE)
+    schedule_executor.shutdown(wait=False)
+
     try:
         # 1. Set up database connection
         conn = setup_database_connection(DB_FILE)
         if conn is None:
             raise Exception("Failed to create database connection.")
+        tune_sqlite(conn)
 
         cursor = conn.cursor()
+        # Every table below is rebuilt inside this one transaction
+        cursor.execute("BEGIN")
 
         # 2. Process Proj1 (Separate files) into 'proj1' table
-        process_separate_files_to_table(cursor, PROJ1_SKATER_FILE, PROJ1_GOALIE_FILE, 'proj1')
+        proj1_df = process_separate_files_to_table(cursor, PROJ1_SKATER_FILE, PROJ1_GOALIE_FILE, 'proj1')
 
         # 3. Process Proj2 (Separate files) into 'proj2' table
-        process_separate_files_to_table(cursor, PROJ2_SKATER_FILE, PROJ2_GOALIE_FILE, 'proj2')
+        proj2_df = process_separate_files_to_table(cursor, PROJ2_SKATER_FILE, PROJ2_GOALIE_FILE, 'proj2')
 
         # 4. Create the final averaged 'projections' table from 'proj1' and 'proj2'
-        create_averaged_projections(conn, cursor)
+        create_averaged_projections(conn, cursor, proj1_df, proj2_df)
 
         # 5. Join the new 'projections' table with Yahoo data
         join_yahoo_ids(conn, cursor)
+        write_projections_parquet(conn)
 
-        # 6. Fetch the full NHL schedule
-        games = get_full_nhl_schedule(START_DATE, END_DATE)
+        # 6. Collect the full NHL schedule (fetched in the background)
+        games = schedule_future.result()
 
         # 7. Create all schedule-related tables
         setup_schedule_tables(cursor, games)
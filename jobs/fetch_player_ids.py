@@ -15,9 +15,7 @@ import unicodedata
 import re
 import json
 import shutil
-from dotenv import load_dotenv
 from datetime import date
-from yfpy.query import YahooFantasySportsQuery
 
 # Configure logging
 logging.basicConfig(
@@ -29,6 +27,30 @@ logger = logging.getLogger(__name__)
 
 MOUNT_PATH = "/var/data/dbs"
 
+TEAM_TRICODE_MAP = {
+    "TB": "TBL",
+    "NJ": "NJD",
+    "SJ": "SJS",
+    "LA": "LAK",
+    "MON": "MTL",
+    "WAS": "WSH"
+}
+
+TEAM_TRICODES = [
+    "ANA", "BOS", "BUF", "CGY", "CAR", "CHI", "COL", "CBJ", "DAL",
+    "DET", "EDM", "FLA", "LAK", "MIN", "MTL", "NSH", "NJD", "NYI",
+    "NYR", "OTT", "PHI", "PIT", "SJS", "SEA", "STL", "TBL", "TOR",
+    "UTA", "VAN", "VGK", "WSH", "WPG"
+]
+
+# Every known Yahoo team abbreviation, upper- and lower-case, mapped straight
+# to its NHL tricode so the common case needs no .upper() call
+TEAM_ABBR_LOOKUP = {
+    abbr: tricode
+    for raw, tricode in {**{t: t for t in TEAM_TRICODES}, **TEAM_TRICODE_MAP}.items()
+    for abbr in (raw, raw.lower())
+}
+
 # --- Database Schema ---
 
 SCHEMA_SQL = """
@@ -45,8 +67,34 @@ CREATE TABLE IF NOT EXISTS players (
     status TEXT,
     player_name_normalized TEXT NOT NULL
 );
+
+-- Covers the projection job's join on player_name_normalized
+CREATE INDEX IF NOT EXISTS idx_players_name_normalized
+    ON players (player_name_normalized, player_id, positions, status);
 """
 
+NAME_CLEAN_RE = re.compile(r'[^a-z0-9]')
+# Punctuation that shows up in ordinary names ("J.T. Miller", "Pierre-Luc Dubois")
+NAME_PUNCTUATION_DROP = str.maketrans('', '', " -'.,")
+
+# --- Name Normalization ---
+
+def normalize_name(name):
+    """
+    Normalizes a player name by converting to lowercase, removing diacritics,
+    and removing all non-alphanumeric characters.
+    """
+    lower_name = name.lower()
+    if lower_name.isascii():
+        # Common case: stripping the usual punctuation leaves only [a-z0-9]
+        stripped = lower_name.translate(NAME_PUNCTUATION_DROP)
+        if stripped.isalnum():
+            return stripped
+    else:
+        # NFKD splits off the diacritics; dropping non-ASCII then removes them
+        lower_name = unicodedata.normalize('NFKD', lower_name).encode('ascii', 'ignore').decode('ascii')
+    return NAME_CLEAN_RE.sub('', lower_name)
+
 # --- Database Connection ---
 
 def get_db_connection(league_id):
@@ -58,7 +106,22 @@ def get_db_connection(league_id):
     # Check if the directory exists, if not, create it
     os.makedirs(MOUNT_PATH, exist_ok=True)
 
-    return sqlite3.connect(db_path)
+    # Autocommit mode: write paths open their own explicit transactions
+    return sqlite3.connect(db_path, isolation_level=None, cached_statements=256)
+
+
+def tune_sqlite(con):
+    """
+    Applies bulk-load PRAGMAs to a connection: WAL journaling with NORMAL
+    sync, in-memory temp storage, a 64MB page cache and a 256MB memory map.
+    """
+    con.executescript(
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA cache_size=-65536;"
+        "PRAGMA mmap_size=268435456;"
+    )
 
 # --- API Authentication ---
 
@@ -68,6 +131,8 @@ def initialize_yahoo_query(league_id, consumer_key, consumer_secret):
     and using a persistent token file on the Render disk.
     """
     logger.debug("Initializing Yahoo query")
+    # Imported here so --help and plain imports of this module don't pay for yfpy
+    from yfpy.query import YahooFantasySportsQuery
 
     # --- NEW: Bootstrap token from Render Secret File ---
     SECRET_TOKEN_PATH = "/etc/secrets/token.json"
@@ -96,23 +161,13 @@ def initialize_yahoo_query(league_id, consumer_key, consumer_secret):
     # --- END NEW LOGIC ---
 
 
-    # --- RENDER-SPECIFIC LOGIC ---
-    original_cwd = os.getcwd()
-    try:
-        # Change the current working directory to the persistent disk
-        # This makes all file operations (like 'token.json') relative to this path.
-        os.chdir(MOUNT_PATH)
-        logger.info(f"Changed directory to persistent disk: {MOUNT_PATH}")
-    except Exception as e:
-        logger.critical(f"Failed to change directory to {MOUNT_PATH}: {e}")
-        return None
-    # --- END RENDER-SPECIFIC LOGIC ---
-
-    # Define the token file path (now relative to the new CWD, i.e., /var/data/dbs/token.json)
-    token_file_path = "token.json"
-    logger.info(f"Checking for token at: {os.path.join(MOUNT_PATH, token_file_path)}")
+    # The token lives on the persistent disk. Use its absolute path rather than
+    # chdir-ing there; the token is handed to yfpy as JSON and saved by us below.
+    token_file_path = PERSISTENT_TOKEN_PATH
+    logger.info(f"Checking for token at: {token_file_path}")
 
     kwargs = {}
+    saved_token_text = None # Raw token.json contents, to skip rewriting an unchanged token
 
     # We *always* pass the consumer key and secret.
     if consumer_key and consumer_secret:
@@ -120,7 +175,6 @@ def initialize_yahoo_query(league_id, consumer_key, consumer_secret):
         kwargs["yahoo_consumer_secret"] = consumer_secret
     else:
         logger.error("CRITICAL: Consumer key/secret are always required.")
-        os.chdir(original_cwd) # Change back before exiting
         return None
 
     # Now, check if we HAVE a token file to use
@@ -128,8 +182,9 @@ def initialize_yahoo_query(league_id, consumer_key, consumer_secret):
         logger.info("Existing token.json found. Reading it and passing as yahoo_access_token_json.")
         try:
             with open(token_file_path, 'r') as f:
-                token_data = json.load(f)
-            kwargs["yahoo_access_token_json"] = token_data
+                token_text = f.read()
+            kwargs["yahoo_access_token_json"] = json.loads(token_text)
+            saved_token_text = token_text
 
         except Exception as e:
             logger.warning(f"Could not read token.json. Will start new auth. Error: {e}")
@@ -151,56 +206,42 @@ def initialize_yahoo_query(league_id, consumer_key, consumer_secret):
 
         yq.game_id = game_id
 
-        # --- MANUALLY SAVE THE TOKEN (EVERY TIME) ---
+        # --- MANUALLY SAVE THE TOKEN (WHEN IT CHANGED) ---
         # After a successful call, save the most up-to-date token
         # back to the persistent disk.
         if yq._yahoo_access_token_dict:
-            logger.info("Auth/refresh successful. Saving/updating token.json...")
-            try:
-                with open(token_file_path, 'w') as f:
-                    json.dump(yq._yahoo_access_token_dict, f)
-                logger.info(f"Successfully saved token to {os.path.join(MOUNT_PATH, token_file_path)}")
-            except Exception as e:
-                logger.error(f"Failed to save token.json: {e}")
+            token_text = json.dumps(yq._yahoo_access_token_dict)
+            # Compare parsed values so key order/whitespace don't force a rewrite
+            if saved_token_text is not None and json.loads(saved_token_text) == json.loads(token_text):
+                logger.info("Token unchanged since last run. Not rewriting token.json.")
+            else:
+                logger.info("Auth/refresh successful. Saving/updating token.json...")
+                try:
+                    # Write to a temp file and swap it in, so a crash mid-write
+                    # can never leave a truncated token.json behind
+                    tmp_token_path = f"{token_file_path}.tmp"
+                    with open(tmp_token_path, 'w') as f:
+                        f.write(token_text)
+                    os.replace(tmp_token_path, token_file_path)
+                    logger.info(f"Successfully saved token to {token_file_path}")
+                except Exception as e:
+                    logger.error(f"Failed to save token.json: {e}")
         else:
             logger.warning("Auth flow finished, but no token data was found in the object.")
 
-        # --- Change back to the original directory ---
-        os.chdir(original_cwd)
-        logger.debug(f"Changed directory back to {original_cwd}")
-
         return yq
 
     except Exception as e:
         logger.critical(f"Failed to initialize Yahoo API query: {e}", exc_info=True)
-        os.chdir(original_cwd) # Change back on error
         return None
 
 # --- Data Fetching ---
 
-def fetch_and_store_players(con, yq):
+def player_rows(players):
     """
-    Writes player name, normalized player name, team, and yahoo id to players
-    table for all players in the league.
+    Yields a players-table row tuple for each API player object, skipping
+    (and logging) any player that can't be processed.
     """
-    logger.info("Fetching player info...")
-
-    try:
-        players = yq.get_league_players()
-    except Exception as e:
-        logger.error(f"Failed to fetch league players from API: {e}", exc_info=True)
-        return
-
-    TEAM_TRICODE_MAP = {
-        "TB": "TBL",
-        "NJ": "NJD",
-        "SJ": "SJS",
-        "LA": "LAK",
-        "MON": "MTL",
-        "WAS": "WSH"
-    }
-
-    player_data_to_insert = []
     for player in players:
         try:
             # --- THIS IS THE FIX ---
@@ -212,9 +253,7 @@ def fetch_and_store_players(con, yq):
             status = player.status
 
             # Normalize player name
-            nfkd_form = unicodedata.normalize('NFKD', player_name.lower())
-            ascii_name = "".join([c for c in nfkd_form if not unicodedata.combining(c)])
-            player_name_normalized = re.sub(r'[^a-z0-9]', '', ascii_name)
+            player_name_normalized = normalize_name(player_name)
 
             # Now this comparison will work (string vs string)
             if player_id == "6777":  # Sebastian Aho
@@ -224,22 +263,35 @@ def fetch_and_store_players(con, yq):
                 player_name_normalized += "f"
                 logger.info(f"Appended 'f' to normalized name for player_id {player_id}")
 
-            player_team_abbr = player.editorial_team_abbr.upper()
-            player_team = TEAM_TRICODE_MAP.get(player_team_abbr, player_team_abbr)
-
-            player_data_to_insert.append((
-                player_id,
-                player_name,
-                player_team,
-                positions,
-                status,
-                player_name_normalized
-            ))
+            player_team = TEAM_ABBR_LOOKUP.get(player.editorial_team_abbr)
+            if player_team is None:
+                player_team_abbr = player.editorial_team_abbr.upper()
+                player_team = TEAM_TRICODE_MAP.get(player_team_abbr, player_team_abbr)
         except Exception as e:
             logger.warning(f"Failed to process player: {player}. Error: {e}")
+            continue
+
+        yield (
+            player_id,
+            player_name,
+            player_team,
+            positions,
+            status,
+            player_name_normalized
+        )
 
-    if not player_data_to_insert:
-        logger.warning("No player data was processed. Nothing to insert.")
+
+def fetch_and_store_players(con, yq):
+    """
+    Writes player name, normalized player name, team, and yahoo id to players
+    table for all players in the league.
+    """
+    logger.info("Fetching player info...")
+
+    try:
+        players = yq.get_league_players()
+    except Exception as e:
+        logger.error(f"Failed to fetch league players from API: {e}", exc_info=True)
         return
 
     try:
@@ -254,15 +306,21 @@ def fetch_and_store_players(con, yq):
                 player_name_normalized
             ) VALUES (?, ?, ?, ?, ?, ?)
         """
-        con.executemany(sql, player_data_to_insert)
-        con.commit()
-        logger.info(f"Successfully inserted or replaced data for {len(player_data_to_insert)} players.")
-
-        # Update metadata
         today = date.today().isoformat()
         sql_meta = "INSERT OR REPLACE INTO metadata (key_, value) VALUES (?, ?)"
-        con.execute(sql_meta, ('last_player_fetch', today))
-        con.commit()
+
+        # Players and metadata go in as one transaction (one commit). Rows are
+        # streamed from the generator, so no full row list is held in memory.
+        with con:
+            con.execute("BEGIN")
+            player_count = con.executemany(sql, player_rows(players)).rowcount
+            if player_count > 0:
+                con.execute(sql_meta, ('last_player_fetch', today))
+
+        if player_count <= 0:
+            logger.warning("No player data was processed. Nothing to insert.")
+            return
+        logger.info(f"Successfully inserted or replaced data for {player_count} players.")
         logger.info(f"Updated 'last_player_fetch' metadata to {today}.")
 
     except Exception as e:
@@ -272,6 +330,7 @@ def fetch_and_store_players(con, yq):
 
 def run():
     """Main function to run the player fetcher."""
+    from dotenv import load_dotenv  # Only needed when actually running the job
     load_dotenv()  # <-- ADD THIS LINE
 
     parser = argparse.ArgumentParser(
@@ -286,6 +345,7 @@ def run():
     try:
         # 1. Connect to and set up the database
         con = get_db_connection(args.league_id)
+        tune_sqlite(con)
         con.executescript(SCHEMA_SQL)
         con.commit()
         logger.info("Database schema checked and applied.")
@@ -1,13 +1,29 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import chain
 import pandas as pd
 from datetime import date, timedelta, datetime
 import time
+import threading
+from collections import deque
 import sqlite3
 import os
+import atexit
 import numpy as np
 import sys
 import unicodedata
 import re
+import json
+
+# orjson isn't a project requirement; use it for the API payloads when it's installed
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 
 MOUNT_PATH = "/var/data/dbs"
@@ -15,6 +31,106 @@ MOUNT_PATH = "/var/data/dbs"
 DB_FILE = os.path.join(MOUNT_PATH, "special_teams.db")
 PROJECTIONS_DB_FILE = os.path.join(MOUNT_PATH, "projections.db")
 
+PP_STATS_URL = "https://api.nhle.com/stats/rest/en/skater/powerplay"
+PP_PAGE_LIMIT = 100 # Rows per powerplay API page
+PP_FETCH_WORKERS = 7 # Concurrent page requests against the powerplay endpoint
+NHL_API_REQUESTS_PER_SECOND = 10 # Shared ceiling across all fetch threads
+REPORT_PAGE_LIMIT = 100 # Rows per page for the season-to-date stats reports
+REPORT_FETCH_WORKERS = 8 # Concurrent page requests per season-to-date report
+TO_DATE_FETCH_WORKERS = 3 # Season-to-date reports fetched side by side
+NHL_API_TIMEOUT = 10 # Seconds to wait on an NHL API connect or read
+
+# Shared keep-alive session so the NHL API calls reuse pooled connections.
+# Throttling and transient server errors are retried with backoff before a
+# fetch gives up; the last response is still returned for raise_for_status.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False
+    )
+))
+
+
+class RateLimiter:
+    """
+    Sliding-window rate limiter shared by the fetch threads. acquire() only
+    blocks once the last second already holds max_per_second requests.
+    """
+    def __init__(self, max_per_second):
+        self.max_per_second = max_per_second
+        self.calls = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Waits until another request fits in the one-second window, then records it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.calls and now - self.calls[0] >= 1.0:
+                    self.calls.popleft()
+                if len(self.calls) < self.max_per_second:
+                    self.calls.append(now)
+                    return
+                wait = 1.0 - (now - self.calls[0])
+            time.sleep(wait)
+
+
+RATE = RateLimiter(NHL_API_REQUESTS_PER_SECOND)
+
+# Serializes the to-date table writes when those reports are fetched concurrently
+DB_WRITE_LOCK = threading.Lock()
+
+# Column order of each powerplay_stats row built in pp_stats_rows
+PP_STATS_COLUMNS = [
+    "date_",
+    "nhlplayerid",
+    "skaterFullName",
+    "teamAbbrevs",
+    "ppTimeOnIce",
+    "ppTimeOnIcePctPerGame",
+    "ppAssists",
+    "ppGoals"
+]
+
+PP_STATS_INSERT_SQL = (
+    f"INSERT OR REPLACE INTO powerplay_stats ({', '.join(PP_STATS_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in PP_STATS_COLUMNS)})"
+)
+
+# Statements run on every job; kept as constants so the connection's statement cache reuses them
+PP_STATS_CLEANUP_SQL = "DELETE FROM powerplay_stats WHERE date_ < ?"
+METADATA_TABLE_EXISTS_SQL = "SELECT name FROM sqlite_master WHERE type='table' AND name='table_metadata'"
+METADATA_END_DATE_SQL = "SELECT end_date FROM table_metadata WHERE id = 1"
+METADATA_UPSERT_SQL = '''
+INSERT INTO table_metadata (id, start_date, end_date)
+VALUES (1, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    start_date = excluded.start_date,
+    end_date = excluded.end_date
+'''
+TEAM_STANDINGS_UPSERT_SQL = '''
+INSERT OR REPLACE INTO team_standings (team_tricode, point_pct, goals_against_per_game, games_played)
+VALUES (?, ?, ?, ?)
+'''
+
+# bangers_to_date is rebuilt from the API rows on every run
+BANGERS_CREATE_SQL = '''
+CREATE TABLE bangers_to_date (
+    nhlplayerid INTEGER,
+    skaterFullName TEXT,
+    player_name_normalized TEXT,
+    teamAbbrevs TEXT,
+    blocksPerGame REAL,
+    hitsPerGame REAL
+)
+'''
+BANGERS_INSERT_SQL = "INSERT INTO bangers_to_date VALUES (?, ?, ?, ?, ?, ?)"
+
 
 FRANCHISE_TO_TRICODE_MAP = {
     "Anaheim Ducks": "ANA",
@@ -102,10 +218,50 @@ def log_unmatched_players(conn, df_unmatched, source_table_name):
     log_df['run_date'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     try:
-        log_df.to_sql('unmatched_players', conn, if_exists='append', index=False)
+        log_df.to_sql('unmatched_players', conn, if_exists='append', index=False, method='multi', chunksize=multi_insert_chunksize(log_df))
     except Exception as e:
         print(f"    Warning: Could not write to unmatched_players: {e}")
 
+# Columns perform_smart_join and log_unmatched_players read from a to-date source table
+SMART_JOIN_KEY_COLUMNS = (
+    'nhlplayerid', 'team', 'teamAbbrevs', 'player_name_normalized',
+    'skaterFullName', 'goalieFullName'
+)
+
+
+def read_smart_join_source(conn, table_name, rename_map):
+    """
+    Reads a to-date table from the attached st_db for perform_smart_join,
+    selecting only the join keys and the columns in rename_map, the latter
+    already aliased to their stats_to_date names. Columns the table doesn't
+    have are skipped, as a rename of a full SELECT * would.
+    """
+    columns = [col for _, col, *_ in conn.execute(f"PRAGMA st_db.table_info({table_name})").fetchall()]
+    # perform_smart_join matches on 'team'; the to-date tables call it teamAbbrevs
+    if 'team' not in columns:
+        rename_map = dict(rename_map, teamAbbrevs='team')
+
+    selected = []
+    for col in columns:
+        if col in rename_map:
+            selected.append(f'"{col}" AS "{rename_map[col]}"')
+        elif col in SMART_JOIN_KEY_COLUMNS:
+            selected.append(f'"{col}"')
+    return pd.read_sql_query(f"SELECT {', '.join(selected)} FROM st_db.{table_name}", conn)
+
+
+def read_projections(conn):
+    """
+    Reads the projections table, selecting a lowercase 'gp' column as 'GP'
+    so it lines up with the to-date games-played column.
+    """
+    selected = [
+        '"gp" AS "GP"' if col == 'gp' else f'"{col}"'
+        for _, col, *_ in conn.execute("PRAGMA table_info(projections)").fetchall()
+    ]
+    return pd.read_sql_query(f"SELECT {', '.join(selected)} FROM projections", conn)
+
+
 def perform_smart_join(base_df, merge_df, merge_cols_data, source_name, conn):
     """
     Joins merge_df into base_df using the Two-Step Priority Logic:
@@ -228,12 +384,81 @@ def perform_smart_join(base_df, merge_df, merge_cols_data, source_name, conn):
 
 
 
+def open_db(path):
+    """
+    Opens a SQLite connection with the per-connection PRAGMAs this job relies
+    on. WAL itself is persistent, so setup_database only has to enable it once.
+    Connections stay with the thread that opened them; check_same_thread is
+    off only so close_connections can close them all at exit.
+    """
+    conn = sqlite3.connect(path, cached_statements=256, check_same_thread=False)
+    conn.executescript(
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA cache_size=-20000;"
+    )
+    return conn
+
+
+# Bind-parameter ceiling for a multi-row INSERT (SQLite builds before 3.32 stop at 999)
+SQLITE_MAX_VARIABLES = 999
+
+
+def multi_insert_chunksize(df):
+    """
+    Rows per multi-row INSERT for df.to_sql(method='multi') that keeps each
+    statement under SQLite's bind-parameter limit.
+    """
+    return max(1, SQLITE_MAX_VARIABLES // max(1, len(df.columns)))
+
+
+# One connection per (database file, thread), shared by every step of the job
+_CONNECTIONS = {}
+
+
+def get_conn(path):
+    """
+    Returns the calling thread's cached connection for a database file,
+    opening it on first use. Any transaction or ATTACH left behind by a step
+    that failed part-way is cleared first, so each caller starts from a clean
+    connection.
+    """
+    key = (path, threading.get_ident())
+    conn = _CONNECTIONS.get(key)
+    if conn is None:
+        conn = open_db(path)
+        _CONNECTIONS[key] = conn
+        return conn
+
+    if conn.in_transaction:
+        conn.rollback()
+    for _, name, _ in conn.execute("PRAGMA database_list").fetchall():
+        if name not in ("main", "temp"):
+            conn.execute(f"DETACH DATABASE {name}")
+    return conn
+
+
+@atexit.register
+def close_connections():
+    """Closes every cached connection when the job exits."""
+    for conn in _CONNECTIONS.values():
+        conn.close()
+    _CONNECTIONS.clear()
+
+
 def setup_database():
     """Creates the powerplay_stats table in the SQLite database if it doesn't exist."""
-    conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_conn(DB_FILE)
+        conn.execute("PRAGMA journal_mode=WAL")
         cursor = conn.cursor()
+        # Let the weekly cleanup hand freed pages back via incremental_vacuum.
+        # A new file picks this up directly; an existing one needs a single VACUUM to convert.
+        cursor.execute("PRAGMA auto_vacuum")
+        if cursor.fetchone()[0] != 2: # 2 = INCREMENTAL
+            print(f"Enabling incremental auto-vacuum on '{DB_FILE}'...")
+            cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            cursor.execute("VACUUM")
         # Use PRIMARY KEY on (date_, nhlplayerid) to prevent exact duplicates
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS powerplay_stats (
@@ -337,96 +562,90 @@ def setup_database():
             startpct INTEGER
         )
         ''')
+        # Franchise name -> tricode lookup used when loading the team stats tables
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS franchise_map (
+            franchise_name TEXT PRIMARY KEY,
+            tricode TEXT
+        ) WITHOUT ROWID
+        ''')
+        # Re-sync with FRANCHISE_TO_TRICODE_MAP on every run so renames/relocations land
+        cursor.execute("DELETE FROM franchise_map")
+        cursor.executemany("INSERT INTO franchise_map (franchise_name, tricode) VALUES (?, ?)", FRANCHISE_TO_TRICODE_MAP.items())
+        # Indexes backing the per-team grouping/self-join in last_game_pp / last_week_pp
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_pp_team_date ON powerplay_stats(teamAbbrevs, date_)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_pp_player ON powerplay_stats(nhlplayerid)")
         conn.commit()
         print(f"Database '{DB_FILE}' and table 'powerplay_stats' are set up.")
     except sqlite3.Error as e:
         print(f"An error occurred with the database setup: {e}")
-    finally:
-        if conn:
-            conn.close()
 
-def get_last_run_end_date():
+def get_last_run_end_date(conn):
     """Fetches the last successfully recorded end_date from metadata."""
-    conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
         cursor = conn.cursor()
         # Check if table exists first, to prevent error on first-ever run
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='table_metadata'")
+        cursor.execute(METADATA_TABLE_EXISTS_SQL)
         if cursor.fetchone() is None:
             return None
 
-        cursor.execute("SELECT end_date FROM table_metadata WHERE id = 1")
+        cursor.execute(METADATA_END_DATE_SQL)
         result = cursor.fetchone()
         if result and result[0]:
             return date.fromisoformat(result[0])
     except sqlite3.Error as e:
         print(f"Error reading metadata, will fetch full 7-day range. Error: {e}")
-    finally:
-        if conn:
-            conn.close()
     return None
 
-def run_database_cleanup(target_start_date):
+def run_database_cleanup(conn, target_start_date):
     """Deletes records from powerplay_stats older than the target start date."""
-    conn = None
     target_start_str = target_start_date.strftime("%Y-%m-%d")
     print(f"\nDeleting old records from database (before {target_start_str})...")
     try:
-        conn = sqlite3.connect(DB_FILE)
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM powerplay_stats WHERE date_ < ?", (target_start_str,))
-        conn.commit()
+        with conn:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(PP_STATS_CLEANUP_SQL, (target_start_str,))
         print(f"Deleted {cursor.rowcount} old records.")
+
+        # Return up to 200 freed pages to the OS. executescript steps the pragma to
+        # completion; a plain execute() stops after the first page.
+        conn.executescript("PRAGMA incremental_vacuum(200);")
     except sqlite3.Error as e:
         print(f"An error occurred during database cleanup: {e}")
-    finally:
-        if conn:
-            conn.close()
 
-def update_metadata(start_date, end_date):
+def update_metadata(conn, start_date, end_date):
     """Updates the metadata table with the new start and end dates of the data window."""
-    conn = None
     start_str = start_date.strftime("%Y-%m-%d")
     end_str = end_date.strftime("%Y-%m-%d")
     print(f"Updating metadata: start_date={start_str}, end_date={end_str}")
     try:
-        conn = sqlite3.connect(DB_FILE)
         cursor = conn.cursor()
         # Use UPSERT logic (INSERT ON CONFLICT)
-        cursor.execute('''
-        INSERT INTO table_metadata (id, start_date, end_date)
-        VALUES (1, ?, ?)
-        ON CONFLICT(id) DO UPDATE SET
-            start_date = excluded.start_date,
-            end_date = excluded.end_date
-        ''', (start_str, end_str))
-        conn.commit()
+        with conn:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(METADATA_UPSERT_SQL, (start_str, end_str))
         print("Metadata updated successfully.")
     except sqlite3.Error as e:
         print(f"An error occurred while updating metadata: {e}")
-    finally:
-        if conn:
-            conn.close()
 
-def create_last_game_pp_table(db_file):
+def create_pp_summary_tables(db_file):
     """
-    Creates/replaces the 'last_game_pp' table with all player rows from
-    the most recent game for each team.
+    Creates/replaces both powerplay summary tables in one transaction:
+    'last_game_pp' with all player rows from the most recent game for each
+    team, and 'last_week_pp' with aggregated 7-day stats for each player,
+    using team total games as the divisor for averages.
     """
-    print("\n--- Creating/Updating 'last_game_pp' Table (Team-Based) ---")
-    conn = None
+    print("\n--- Creating/Updating 'last_game_pp' and 'last_week_pp' Tables ---")
     try:
-        conn = sqlite3.connect(db_file)
+        conn = get_conn(db_file)
         cursor = conn.cursor()
 
-        # Drop the table if it already exists to ensure a fresh build
-        cursor.execute("DROP TABLE IF EXISTS last_game_pp")
-
+        # last_game_pp:
         # 1. Find the max date for each team
         # 2. Join that result back to the main table
         # 3. Create the new table from all matching rows
-        query = """
+        last_game_query = """
         CREATE TABLE last_game_pp AS
         SELECT
             t1.*
@@ -443,39 +662,11 @@ def create_last_game_pp_table(db_file):
         ) t2 ON t1.teamAbbrevs = t2.teamAbbrevs AND t1.date_ = t2.max_date;
         """
 
-        cursor.execute(query)
-        conn.commit()
-
-        # Log how many records were created
-        cursor.execute("SELECT COUNT(*) FROM last_game_pp")
-        count = cursor.fetchone()[0]
-        print(f"Successfully created 'last_game_pp' table with {count} total player entries (from teams' last games).")
-
-    except sqlite3.Error as e:
-        print(f"An error occurred while creating 'last_game_pp' table: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-def create_last_week_pp_table(db_file):
-    """
-    Creates/replaces the 'last_week_pp' table with aggregated 7-day stats
-    for each player, using team total games as the divisor for averages.
-    """
-    print("\n--- Creating/Updating 'last_week_pp' Table (Aggregated) ---")
-    conn = None
-    try:
-        conn = sqlite3.connect(db_file)
-        cursor = conn.cursor()
-
-        # Drop the table if it already exists
-        cursor.execute("DROP TABLE IF EXISTS last_week_pp")
-
-        # This query does all the work:
+        # last_week_pp does all the work in one query:
         # 1. 'team_game_counts' CTE: Counts distinct games for each team in the (7-day) table.
         # 2. 'player_sums' CTE: SUMs all stats for each player (grouped by player AND team).
         # 3. Final SELECT: Joins the two CTEs and performs the custom division.
-        query = """
+        last_week_query = """
         CREATE TABLE last_week_pp AS
 
         -- Step 1: Count distinct games played by each team in the last 7 days
@@ -530,54 +721,118 @@ def create_last_week_pp_table(db_file):
             team_game_counts tgc ON ps.teamAbbrevs = tgc.teamAbbrevs;
         """
 
-        cursor.execute(query)
-        conn.commit()
+        # Rebuild both tables back-to-back so they share one commit and a warm page cache
+        with conn:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("DROP TABLE IF EXISTS last_game_pp")
+            cursor.execute("DROP TABLE IF EXISTS last_week_pp")
+            cursor.execute(last_game_query)
+            cursor.execute(last_week_query)
+            # join_special_teams_data looks players up in both tables by nhlplayerid
+            cursor.execute("CREATE INDEX ix_last_game_pp_player ON last_game_pp(nhlplayerid)")
+            cursor.execute("CREATE INDEX ix_last_week_pp_player ON last_week_pp(nhlplayerid)")
+
+        # Fresh statistics for the rebuilt tables, for the planner in that join
+        cursor.execute("ANALYZE last_game_pp")
+        cursor.execute("ANALYZE last_week_pp")
 
         # Log how many records were created
+        cursor.execute("SELECT COUNT(*) FROM last_game_pp")
+        count = cursor.fetchone()[0]
+        print(f"Successfully created 'last_game_pp' table with {count} total player entries (from teams' last games).")
+
         cursor.execute("SELECT COUNT(*) FROM last_week_pp")
         count = cursor.fetchone()[0]
         print(f"Successfully created 'last_week_pp' table with {count} aggregated player entries.")
 
     except sqlite3.Error as e:
-        print(f"An error occurred while creating 'last_week_pp' table: {e}")
-    finally:
-        if conn:
-            conn.close()
+        print(f"An error occurred while creating the powerplay summary tables: {e}")
 
-def fetch_daily_pp_stats():
+def fetch_pp_page(cayenne_exp, start_index):
     """
-    Fetches NHL powerplay stats for the previous 7 days, not including today.
-    It queries the API day-by-day to get per-game stats and handles pagination.
+    Fetches one page of per-game powerplay stats for the given filter and
+    returns (players, total_records). A failed request is logged and
+    re-raised, so the caller can roll back the upload rather than commit a
+    window with a page missing.
     """
-
-    # --- 1. Define Fields and Data Structures ---
-
-    # These are the fields we want to pull from the API response
-    FIELDS_TO_EXTRACT = [
-        "playerId",
-        "skaterFullName",
-        "teamAbbrevs",
-        "ppTimeOnIce",
-        "ppTimeOnIcePctPerGame",
-        "ppAssists",
-        "ppGoals"
-    ]
-
-    # This maps the API field name to the final column name you requested
-    COLUMN_REMAP = {
-        "playerId": "nhlplayerid"
+    params = {
+        "isAggregate": "false",
+        "isGame": "true",
+        # With isGame=true a player has one row per game, so gameId is needed after
+        # playerId to make the order total; otherwise tied rows (e.g. several 0:00
+        # games for one player) can shift between concurrently fetched pages
+        "sort": '[{"property":"ppTimeOnIce","direction":"DESC"},{"property":"playerId","direction":"ASC"},{"property":"gameId","direction":"ASC"}]',
+        "start": start_index,
+        "limit": PP_PAGE_LIMIT,
+        "cayenneExp": cayenne_exp
     }
 
-    # This list will hold all the dictionaries of player data
-    all_player_data = []
+    try:
+        # Make the API request, waiting only if we're over the shared rate limit
+        RATE.acquire()
+        response = SESSION.get(PP_STATS_URL, params=params, timeout=NHL_API_TIMEOUT)
+        response.raise_for_status()  # Raise an error for bad responses (404, 500, etc.)
+
+        data = json_loads(response.content)
+        players = data.get("data", [])
+        total_records = data.get("total", 0)
+        if players:
+            print(f"  Processing records {start_index + 1}-{start_index + len(players)} of {total_records}...")
+        return players, total_records
+
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"  Error fetching powerplay data (start={start_index}): {e}")
+        raise
+
+def pp_stats_rows(players, seen_keys):
+    """
+    Converts API player-game records into powerplay_stats rows (tuples in
+    PP_STATS_COLUMNS order). The API pagination can return the same
+    player-game twice, so only the first row per (date_, nhlplayerid) is kept.
+    Records without a gameDate can't be keyed by day and are skipped.
+    """
+    rows = []
+    for player in players:
+        # gameDate may carry a time component; the table is keyed by day
+        game_date = (player.get("gameDate") or "")[:10]
+        if not game_date:
+            continue
+        player_id = player.get("playerId")
+        key = (game_date, player_id)
+        if key in seen_keys:
+            continue
+        seen_keys.add(key)
+
+        rows.append((
+            game_date,
+            player_id,
+            player.get("skaterFullName"),
+            # Per-game (isGame=true) rows name the team teamAbbrev; aggregate rows use teamAbbrevs
+            player.get("teamAbbrev") or player.get("teamAbbrevs"),
+            player.get("ppTimeOnIce"),
+            player.get("ppTimeOnIcePctPerGame"),
+            player.get("ppAssists"),
+            player.get("ppGoals")
+        ))
+    return rows
 
-    # --- 2. Calculate Date Range ---
+def fetch_daily_pp_stats():
+    """
+    Fetches NHL powerplay stats for the previous 7 days, not including today.
+    It issues one per-game query for the whole date range and fetches the
+    pages after the first in parallel.
+    """
+
+    # --- 1. Calculate Date Range ---
 
     today = date.today()
     target_end_date = today - timedelta(days=1)   # Yesterday
     target_start_date = today - timedelta(days=7) # 7 days ago
 
-    last_run_end_date = get_last_run_end_date()
+    # One connection serves the metadata reads, cleanup, upload and metadata write
+    conn = get_conn(DB_FILE)
+
+    last_run_end_date = get_last_run_end_date(conn)
 
     if last_run_end_date:
         # Start querying from the day *after* the last run
@@ -594,184 +849,87 @@ def fetch_daily_pp_stats():
     query_end_date = target_end_date
 
     # Run database cleanup *before* fetching, based on the target window
-    run_database_cleanup(target_start_date)
+    run_database_cleanup(conn, target_start_date)
 
     # Check if we are already up to date
     if query_start_date > query_end_date:
         print(f"Data is already up to date (as of {last_run_end_date}). No new data to fetch.")
         # We still update metadata to reflect the new cleanup (start_date)
         if last_run_end_date: # Only update if last_run_end_date is not None
-            update_metadata(target_start_date, last_run_end_date)
+            update_metadata(conn, target_start_date, last_run_end_date)
         return False # Return False to indicate no new data was fetched
 
     print(f"Target data window: {target_start_date} to {target_end_date}")
     print(f"Fetching new data for: {query_start_date} to {query_end_date}")
 
-    # Create a list of all date strings we need to query
-    dates_to_query = []
-    current_date = query_start_date
-    while current_date <= query_end_date:
-        dates_to_query.append(current_date.strftime("%Y-%m-%d"))
-        current_date += timedelta(days=1)
-
-    # --- 3. Loop Through Each Day and Fetch Data ---
-
-    BASE_URL = "https://api.nhle.com/stats/rest/en/skater/powerplay"
-
-    for query_date in dates_to_query:
-        print(f"\n--- Querying for date: {query_date} ---")
-
-        start_index = 0
-        limit = 100
-
-        # This inner loop handles pagination for a single day
-        while True:
-            # Build the filter expression for this specific day
-            cayenne_exp = f'gameDate>="{query_date}" and gameDate<="{query_date}" and gameTypeId=2'
-
-            params = {
-                "isAggregate": "false",
-                "sort": '[{"property":"ppTimeOnIce","direction":"DESC"}]',
-                "start": start_index,
-                "limit": limit,
-                "cayenneExp": cayenne_exp
-            }
-
-            try:
-                # Make the API request
-                response = requests.get(BASE_URL, params=params)
-                response.raise_for_status()  # Raise an error for bad responses (404, 500, etc.)
-
-                data = response.json()
-                players = data.get("data", [])
-                total_records = data.get("total", 0)
-
-                if not players:
-                    # No more players found for this day, break the pagination loop
-                    print(f"  No more records for {query_date}. (Processed {start_index} of {total_records} total)")
-                    break
-
-                print(f"  Processing records {start_index + 1}-{start_index + len(players)} of {total_records} for {query_date}...")
-
-                # Process each player's data
-                for player in players:
-                    record = {}
-
-                    # Add the date we are querying
-                    record["date_"] = query_date
-
-                    # Extract and rename the fields
-                    for field in FIELDS_TO_EXTRACT:
-                        # Use the remapped name if it exists, otherwise use the original field name
-                        new_name = COLUMN_REMAP.get(field, field)
-                        record[new_name] = player.get(field)
-
-                    all_player_data.append(record)
+    # --- 2. Fetch All Pages, Writing Rows as They Arrive ---
 
-                # Increment 'start' for the next page
-                start_index += limit
+    # One range filter covers every day; isGame=true keeps the rows per game
+    cayenne_exp = f'gameDate>="{query_start_date}" and gameDate<="{query_end_date}" and gameTypeId=2'
 
-                # Be a good citizen and pause briefly between paged requests
-                time.sleep(0.5)
-
-            except requests.exceptions.RequestException as e:
-                print(f"  Error fetching data for {query_date} (start={start_index}): {e}")
-                # Stop trying to paginate for this day if an error occurs
-                break
-
-        # Pause briefly between *days*
-        time.sleep(1)
-
-    # --- 4. Create DataFrame and Write to Database ---
+    # Each page's rows go straight into powerplay_stats. INSERT OR REPLACE on the
+    # (date_, nhlplayerid) key overwrites any row we already hold for these dates.
+    total_rows = 0
+    fetched_records = 0
+    sample_rows = []
+    seen_keys = set()
+    try:
+        cursor = conn.cursor()
 
-    print("\n--- Data Fetching Complete ---")
+        # The first page tells us the total, so the rest can be requested concurrently
+        first_page, total_records = fetch_pp_page(cayenne_exp, 0)
+        page_starts = range(PP_PAGE_LIMIT, total_records, PP_PAGE_LIMIT)
+
+        # The whole upload is one transaction; map() yields the pages in order
+        with conn, ThreadPoolExecutor(max_workers=PP_FETCH_WORKERS) as executor:
+            cursor.execute("BEGIN IMMEDIATE")
+            pages = executor.map(partial(fetch_pp_page, cayenne_exp), page_starts)
+            for players, _ in chain([(first_page, total_records)], pages):
+                fetched_records += len(players)
+                page_rows = pp_stats_rows(players, seen_keys)
+                if not page_rows:
+                    continue
+                cursor.executemany(PP_STATS_INSERT_SQL, page_rows)
+                total_rows += len(page_rows)
+                if len(sample_rows) < 5:
+                    sample_rows.extend(page_rows[:5 - len(sample_rows)])
+
+        print("\n--- Data Fetching Complete ---")
+
+        if fetched_records != total_rows:
+            print(f"\nDropped {fetched_records - total_rows} duplicate records from the new data.")
+
+        if total_rows:
+            print(f"Successfully wrote a total of {total_rows} player-game records to {DB_FILE}.")
+
+            # Display the first 5 rows
+            print("\nData Sample (first 5 rows):")
+            print(PP_STATS_COLUMNS)
+            for row in sample_rows:
+                print(row)
+
+            # Refresh planner statistics for the grouping indexes after the reload
+            cursor.execute("ANALYZE powerplay_stats")
+
+    except (requests.exceptions.RequestException, ValueError) as e:
+        # A failed page rolled the whole upload back. Leave the metadata alone
+        # so the next run fetches this window again.
+        print(f"Powerplay fetch failed ({e}); nothing was written for {query_start_date} to {query_end_date}.")
+        return False
+    except sqlite3.Error as e:
+        print(f"An error occurred while writing to the database: {e}")
+        # The upload was rolled back; don't mark the window as covered
+        return False
 
-    if not all_player_data:
+    if not total_rows:
         print("No new data was found for the specified date range.")
         # Still update metadata to show the window we've covered
-        update_metadata(target_start_date, target_end_date)
+        update_metadata(conn, target_start_date, target_end_date)
         return False # Return False to indicate no new data was fetched
 
-    # Convert the list of dictionaries into a pandas DataFrame
-    df = pd.DataFrame(all_player_data)
-
-    # Re-order columns to your specification
-    final_columns = [
-        "date_",
-        "nhlplayerid",
-        "skaterFullName",
-        "teamAbbrevs",
-        "ppTimeOnIce",
-        "ppTimeOnIcePctPerGame",
-        "ppAssists",
-        "ppGoals"
-    ]
-
-    # Make sure all requested columns are in the DataFrame before re-ordering
-    available_columns = [col for col in final_columns if col in df.columns]
-    df = df[available_columns]
-
-    print(f"Successfully fetched a total of {len(df)} player-game records.")
-
-    # Display the first 5 rows
-    print("\nData Sample (first 5 rows):")
-    print(df.head())
-
-    # --- 5. Write data to SQLite database ---
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-
-        # --- NEW LOGIC: ---
-        # Get all unique dates from our new data
-
-        # --- FIX: Drop duplicates from the dataframe *before* writing ---
-        # This handles cases where the API pagination might return the same player twice.
-        initial_record_count = len(df)
-        df.drop_duplicates(subset=['date_', 'nhlplayerid'], keep='first', inplace=True)
-        final_record_count = len(df)
-
-        if initial_record_count != final_record_count:
-            print(f"\nDropped {initial_record_count - final_record_count} duplicate records from the new data.")
-        # --- END FIX ---
-
-        dates_in_dataframe = df['date_'].unique()
-
-        print(f"\nDeleting existing records for {len(dates_in_dataframe)} new dates to prevent duplicates...")
-
-        # Create a placeholder string like "(?, ?, ?)"
-        placeholders = ', '.join('?' for _ in dates_in_dataframe)
-
-        # Delete all rows in the DB that match the dates we are about to insert
-        cursor.execute(f"DELETE FROM powerplay_stats WHERE date_ IN ({placeholders})", tuple(dates_in_dataframe))
-        conn.commit()
-
-        print(f"Deleted {cursor.rowcount} old records for the new date range.")
-        # --- END NEW LOGIC ---
-
-        # Write the new DataFrame data to the 'powerplay_stats' table
-        print(f"Writing {len(df)} new records to 'powerplay_stats' table...")
-        # Using if_exists='append' because we've already cleared the date range.
-        df.to_sql('powerplay_stats', conn, if_exists='append', index=False)
-        conn.commit()
-
-        print(f"Successfully wrote {len(df)} records to {DB_FILE}.")
-
-    except sqlite3.Error as e:
-        # Handle potential "UNIQUE constraint failed" errors if the cleanup logic failed
-        # This "except" block should ideally not be hit anymore, but we'll keep it as a safeguard.
-        if "UNIQUE constraint failed" in str(e):
-            print(f"Note: Some records may have already existed in the database.")
-        else:
-            print(f"An error occurred while writing to the database: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-    # --- 6. Update Metadata ---
+    # --- 3. Update Metadata ---
     # Update metadata to reflect the new 7-day window
-    update_metadata(target_start_date, target_end_date)
+    update_metadata(conn, target_start_date, target_end_date)
     return True # Return True to indicate new data was fetched and written
 
 
@@ -798,10 +956,10 @@ def fetch_team_stats_summary():
     all_team_data = []
 
     try:
-        response = requests.get(API_URL, params=params)
+        response = SESSION.get(API_URL, params=params, timeout=NHL_API_TIMEOUT)
         response.raise_for_status()
 
-        data = response.json()
+        data = json_loads(response.content)
         teams_list = data.get("data", [])
 
         if not teams_list:
@@ -811,7 +969,6 @@ def fetch_team_stats_summary():
         # 2. Process the data
         for team in teams_list:
             franchise_name = team.get("teamFullName")
-            team_tricode = FRANCHISE_TO_TRICODE_MAP.get(franchise_name)
             pp_pct = team.get("powerPlayPct")
             pk_pct = team.get("penaltyKillPct")
             gf_gm = team.get("goalsForPerGame")
@@ -819,40 +976,38 @@ def fetch_team_stats_summary():
             sogf_gm = team.get("shotsForPerGame")
             soga_gm = team.get("shotsAgainstPerGame")
 
+            # The tricode is resolved against franchise_map during the insert
+            all_team_data.append((pp_pct, pk_pct, gf_gm, ga_gm, sogf_gm, soga_gm, franchise_name))
 
-            if team_tricode:
-                all_team_data.append((team_tricode, pp_pct, pk_pct, gf_gm, ga_gm, sogf_gm, soga_gm))
-
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"  Error fetching team stats: {e}")
         return
 
     # 3. Write to Database
-    conn = None
     if not all_team_data:
         return
 
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_conn(DB_FILE)
         cursor = conn.cursor()
 
-        print(f"  Clearing 'team_stats_summary' table...")
-        cursor.execute("DELETE FROM team_stats_summary")
+        # One IMMEDIATE transaction for the clear + reload, committed by the context manager
+        with conn:
+            cursor.execute("BEGIN IMMEDIATE")
+            print(f"  Clearing 'team_stats_summary' table...")
+            cursor.execute("DELETE FROM team_stats_summary")
 
-        print(f"  Inserting {len(all_team_data)} team records (PP% / PK%)...")
-        cursor.executemany('''
-        INSERT INTO team_stats_summary (team_tricode, pp_pct, pk_pct, gf_gm, ga_gm, sogf_gm, soga_gm)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', all_team_data)
+            # Rows whose franchise isn't in franchise_map select nothing and are skipped
+            cursor.executemany('''
+            INSERT INTO team_stats_summary (team_tricode, pp_pct, pk_pct, gf_gm, ga_gm, sogf_gm, soga_gm)
+            SELECT fm.tricode, ?, ?, ?, ?, ?, ? FROM franchise_map fm WHERE fm.franchise_name = ?
+            ''', all_team_data)
+            print(f"  Inserted {cursor.rowcount} team records (PP% / PK%).")
 
-        conn.commit()
         print("  Successfully updated 'team_stats_summary' table.")
 
     except sqlite3.Error as e:
         print(f"  Database error: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 
 def fetch_team_stats_weekly():
@@ -889,9 +1044,9 @@ def fetch_team_stats_weekly():
     all_team_data = []
 
     try:
-        response = requests.get(API_URL, params=params)
+        response = SESSION.get(API_URL, params=params, timeout=NHL_API_TIMEOUT)
         response.raise_for_status()
-        data = response.json()
+        data = json_loads(response.content)
         teams_list = data.get("data", [])
         if not teams_list:
             print("  No weekly team stats data found in API response.")
@@ -900,7 +1055,6 @@ def fetch_team_stats_weekly():
         # 3. Process the data
         for team in teams_list:
             franchise_name = team.get("franchiseName")
-            team_tricode = FRANCHISE_TO_TRICODE_MAP.get(franchise_name)
             pp_pct = team.get("powerPlayPct")
             pk_pct = team.get("penaltyKillPct")
             gf_gm = team.get("goalsForPerGame")
@@ -908,69 +1062,65 @@ def fetch_team_stats_weekly():
             sogf_gm = team.get("shotsForPerGame")
             soga_gm = team.get("shotsAgainstPerGame")
 
-            if team_tricode:
-                all_team_data.append((team_tricode, pp_pct, pk_pct, gf_gm, ga_gm, sogf_gm, soga_gm))
+            # The tricode is resolved against franchise_map during the insert
+            all_team_data.append((pp_pct, pk_pct, gf_gm, ga_gm, sogf_gm, soga_gm, franchise_name))
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"  Error fetching weekly team stats: {e}")
         return
 
     # 4. Write to Database
-    conn = None
     if not all_team_data:
         return
 
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_conn(DB_FILE)
         cursor = conn.cursor()
 
-        print(f"  Clearing 'team_stats_weekly' table...")
-        cursor.execute("DELETE FROM team_stats_weekly")
+        # One IMMEDIATE transaction for the clear + reload, committed by the context manager
+        with conn:
+            cursor.execute("BEGIN IMMEDIATE")
+            print(f"  Clearing 'team_stats_weekly' table...")
+            cursor.execute("DELETE FROM team_stats_weekly")
 
-        print(f"  Inserting {len(all_team_data)} weekly team records (PP% / PK%)...")
-        cursor.executemany('''
-        INSERT INTO team_stats_weekly (team_tricode, pp_pct_weekly, pk_pct_weekly, gf_gm_weekly, ga_gm_weekly, sogf_gm_weekly, soga_gm_weekly)
-        VALUES (?, ?, ?, ?, ?, ?, ? )
-        ''', all_team_data)
+            # Rows whose franchise isn't in franchise_map select nothing and are skipped
+            cursor.executemany('''
+            INSERT INTO team_stats_weekly (team_tricode, pp_pct_weekly, pk_pct_weekly, gf_gm_weekly, ga_gm_weekly, sogf_gm_weekly, soga_gm_weekly)
+            SELECT fm.tricode, ?, ?, ?, ?, ?, ? FROM franchise_map fm WHERE fm.franchise_name = ?
+            ''', all_team_data)
+            print(f"  Inserted {cursor.rowcount} weekly team records (PP% / PK%).")
 
-        conn.commit()
         print("  Successfully updated 'team_stats_weekly' table.")
 
     except sqlite3.Error as e:
         print(f"  Database error: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 
-def copy_team_stats_to_projections():
+def copy_special_teams_table_to_projections(table_name):
     """
-    Copies the 'team_stats_summary' table from special_teams.db
-    into projections.db as a new, separate table.
+    Copies one table from special_teams.db into projections.db with a single
+    CREATE TABLE AS over the attached database, replacing any previous copy.
     """
-    print("\n--- Copying 'team_stats_summary' table to projections.db ---")
-    conn = None
     try:
-        conn = sqlite3.connect(PROJECTIONS_DB_FILE)
+        conn = get_conn(PROJECTIONS_DB_FILE)
         cursor = conn.cursor()
 
         print(f"  Attaching Special Teams DB: {DB_FILE}")
         cursor.execute(f"ATTACH DATABASE '{DB_FILE}' AS special_teams_db")
 
-        print("  Reading 'team_stats_summary' from special_teams_db...")
-        df_stats = pd.read_sql_query("SELECT * FROM special_teams_db.team_stats_summary", conn)
-
-        if not df_stats.empty:
-            print(f"  Writing {len(df_stats)} records to 'team_stats_summary' table in {PROJECTIONS_DB_FILE}...")
-            df_stats.to_sql('team_stats_summary',
-                            conn,
-                            if_exists='replace',
-                            index=False,
-                            dtype={'team_tricode': 'TEXT', 'pp_pct': 'REAL', 'pk_pct': 'REAL', 'gf_gm': 'REAL', 'ga_gm': 'REAL', 'sogf_gm': 'REAL', 'soga_gm': 'REAL'})
-            conn.commit()
-            print("  Successfully copied 'team_stats_summary' table.")
+        cursor.execute(f"SELECT COUNT(*) FROM special_teams_db.{table_name}")
+        count = cursor.fetchone()[0]
+
+        if count:
+            print(f"  Writing {count} records to '{table_name}' table in {PROJECTIONS_DB_FILE}...")
+            with conn:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute(f"DROP TABLE IF EXISTS main.{table_name}")
+                cursor.execute(f"CREATE TABLE main.{table_name} AS SELECT * FROM special_teams_db.{table_name}")
+            print(f"  Successfully copied '{table_name}' table.")
         else:
-            print("  Warning: Source table was empty.")
+            # Leave the previous copy in place rather than replacing it with nothing
+            print(f"  Warning: Source '{table_name}' table was empty.")
 
         cursor.execute("DETACH DATABASE special_teams_db")
 
@@ -978,8 +1128,15 @@ def copy_team_stats_to_projections():
         print(f"  Error during copy: {e}", file=sys.stderr)
         try: cursor.execute("DETACH DATABASE special_teams_db")
         except: pass
-    finally:
-        if conn: conn.close()
+
+
+def copy_team_stats_to_projections():
+    """
+    Copies the 'team_stats_summary' table from special_teams.db
+    into projections.db as a new, separate table.
+    """
+    print("\n--- Copying 'team_stats_summary' table to projections.db ---")
+    copy_special_teams_table_to_projections('team_stats_summary')
 
 
 def copy_team_stats_weekly_to_projections():
@@ -988,37 +1145,7 @@ def copy_team_stats_weekly_to_projections():
     into projections.db as a new, separate table.
     """
     print("\n--- Copying 'team_stats_weekly' table to projections.db ---")
-    conn = None
-    try:
-        conn = sqlite3.connect(PROJECTIONS_DB_FILE)
-        cursor = conn.cursor()
-
-        print(f"  Attaching Special Teams DB: {DB_FILE}")
-        cursor.execute(f"ATTACH DATABASE '{DB_FILE}' AS special_teams_db")
-
-        print("  Reading 'team_stats_weekly' from special_teams_db...")
-        df_stats = pd.read_sql_query("SELECT * FROM special_teams_db.team_stats_weekly", conn)
-
-        if not df_stats.empty:
-            print(f"  Writing {len(df_stats)} records to 'team_stats_weekly' table in {PROJECTIONS_DB_FILE}...")
-            df_stats.to_sql('team_stats_weekly',
-                            conn,
-                            if_exists='replace',
-                            index=False,
-                            dtype={'team_tricode': 'TEXT', 'pp_pct_weekly': 'REAL', 'pk_pct_weekly': 'REAL', 'gf_gm_weekly': 'REAL', 'ga_gm_weekly': 'REAL', 'sogf_gm_weekly': 'REAL', 'soga_gm_weekly': 'REAL'})
-            conn.commit()
-            print("  Successfully copied 'team_stats_weekly' table.")
-        else:
-            print("  Warning: Source 'team_stats_weekly' table was empty.")
-
-        cursor.execute("DETACH DATABASE special_teams_db")
-
-    except Exception as e:
-        print(f"  Error during copy: {e}", file=sys.stderr)
-        try: cursor.execute("DETACH DATABASE special_teams_db")
-        except: pass
-    finally:
-        if conn: conn.close()
+    copy_special_teams_table_to_projections('team_stats_weekly')
 
 
 
@@ -1029,47 +1156,34 @@ def join_special_teams_data():
     into the main projections table (in projections.db).
     """
     print("\n--- Joining Special Teams (Powerplay) Data into projections.db ---")
-    conn = None
     try:
         # 1. Connect to the MAIN projections.db
-        conn = sqlite3.connect(PROJECTIONS_DB_FILE)
+        conn = get_conn(PROJECTIONS_DB_FILE)
         cursor = conn.cursor()
 
         # 2. Attach the special_teams.db
         print(f"Attaching Special Teams DB: {DB_FILE}")
         cursor.execute(f"ATTACH DATABASE '{DB_FILE}' AS special_teams_db")
 
-        # 3. Load the current 'projections' table from projections.db
-        df_proj = pd.read_sql_query("SELECT * FROM projections", conn)
-        if df_proj.empty:
+        # 3. Check the current 'projections' table in projections.db
+        cursor.execute("SELECT COUNT(*) FROM projections")
+        proj_count = cursor.fetchone()[0]
+        if proj_count == 0:
             print("Error: 'projections' table is empty. Cannot join data.")
             print("Please run the full create_projection_db.py script first.")
             return
-        print(f"Loaded {len(df_proj)} players from 'projections' table.")
-
-        # 4. Load 'last_game_pp' data from special_teams.db
-        lg_cols_to_load = [
-            "nhlplayerid",
-            "ppTimeOnIce",
-            "ppTimeOnIcePctPerGame",
-            "ppAssists",
-            "ppGoals"
-        ]
-        lg_query = f"SELECT {', '.join(lg_cols_to_load)} FROM special_teams_db.last_game_pp"
-        df_last_game = pd.read_sql_query(lg_query, conn)
-        print(f"Loaded {len(df_last_game)} rows from 'last_game_pp'.")
+        print(f"Found {proj_count} players in 'projections' table.")
 
-        # Rename columns with "lg_" prefix
-        df_last_game = df_last_game.rename(columns={
+        # 4. Columns to bring in from 'last_game_pp', with the "lg_" prefix
+        lg_columns = {
             "ppTimeOnIce": "lg_ppTimeOnIce",
             "ppTimeOnIcePctPerGame": "lg_ppTimeOnIcePctPerGame",
             "ppAssists": "lg_ppAssists",
             "ppGoals": "lg_ppGoals"
-        })
+        }
 
-        # 5. Load 'last_week_pp' data from special_teams.db
-        lw_cols_to_load = [
-            "nhlplayerid",
+        # 5. Columns to bring in from 'last_week_pp' (names kept as-is)
+        lw_columns = [
             "avg_ppTimeOnIce",
             "avg_ppTimeOnIcePctPerGame",
             "total_ppAssists",
@@ -1077,52 +1191,48 @@ def join_special_teams_data():
             "player_games_played",
             "team_games_played"
         ]
-        lw_query = f"SELECT {', '.join(lw_cols_to_load)} FROM special_teams_db.last_week_pp"
-        df_last_week = pd.read_sql_query(lw_query, conn)
-        print(f"Loaded {len(df_last_week)} rows from 'last_week_pp'.")
-
-        # 6. Merge the dataframes
-        # First, clean up projections table from any old pp columns
-        lg_cols_to_drop = list(df_last_game.columns.drop('nhlplayerid'))
-        lw_cols_to_drop = list(df_last_week.columns.drop('nhlplayerid'))
-        all_cols_to_drop = lg_cols_to_drop + lw_cols_to_drop
-
-        existing_cols_to_drop = [col for col in all_cols_to_drop if col in df_proj.columns]
-        if existing_cols_to_drop:
-            print(f"Dropping {len(existing_cols_to_drop)} old special teams columns...")
-            df_proj = df_proj.drop(columns=existing_cols_to_drop)
 
-        # Merge last game data (on 'nhlplayerid')
-        df_final = pd.merge(df_proj, df_last_game, on='nhlplayerid', how='left')
-        print(f"Merged 'last_game_pp' data. DataFrame shape: {df_final.shape}")
-
-        # Merge last week data (on 'nhlplayerid')
-        df_final = pd.merge(df_final, df_last_week, on='nhlplayerid', how='left')
-        print(f"Merged 'last_week_pp' data. DataFrame shape: {df_final.shape}")
-
-        # 7. Save back to the 'projections' table
-        print(f"Saving {len(df_final)} players back to 'projections' table...")
+        # 6. Build the joined table in SQL
+        # Any old pp columns from a previous run are left out of the projections side.
+        # The ORDER BY keeps the row order a left merge would give (players traded
+        # mid-week can match more than one pp row).
+        all_cols_to_drop = set(lg_columns.values()) | set(lw_columns)
+        cursor.execute("PRAGMA table_info(projections)")
+        proj_columns = [row[1] for row in cursor.fetchall()]
+        kept_columns = [col for col in proj_columns if col not in all_cols_to_drop]
+        dropped_count = len(proj_columns) - len(kept_columns)
+        if dropped_count:
+            print(f"Dropping {dropped_count} old special teams columns...")
+
+        select_list = [f'p."{col}"' for col in kept_columns]
+        select_list += [f'lg."{src}" AS "{alias}"' for src, alias in lg_columns.items()]
+        select_list += [f'lw."{col}"' for col in lw_columns]
+
+        join_query = f"""
+        CREATE TABLE projections_new AS
+        SELECT {', '.join(select_list)}
+        FROM projections p
+        LEFT JOIN special_teams_db.last_game_pp lg ON lg.nhlplayerid = p.nhlplayerid
+        LEFT JOIN special_teams_db.last_week_pp lw ON lw.nhlplayerid = p.nhlplayerid
+        ORDER BY p.rowid, lg.rowid, lw.rowid
+        """
 
-        # Re-apply Int64 types to ensure INTEGER columns
-        if 'nhlplayerid' in df_final.columns:
-            df_final['nhlplayerid'] = pd.to_numeric(df_final['nhlplayerid'], errors='coerce').fillna(pd.NA).astype('Int64')
-        if 'player_id' in df_final.columns:
-             df_final['player_id'] = pd.to_numeric(df_final['player_id'], errors='coerce').fillna(pd.NA).astype('Int64')
+        # 7. Swap the joined table in for 'projections' in one transaction
+        with conn:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("DROP TABLE IF EXISTS projections_new")
+            cursor.execute(join_query)
+            cursor.execute("DROP TABLE projections")
+            cursor.execute("ALTER TABLE projections_new RENAME TO projections")
 
-        df_final.to_sql('projections',
-                        conn,
-                        if_exists='replace',
-                        index=False,
-                        dtype={'nhlplayerid': 'INTEGER', 'player_id': 'INTEGER'})
+            # 8. Re-create the index (dropped with the old table)
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_normalized_name_projections ON projections(player_name_normalized)')
 
-        # 8. Re-create the index (to_sql replaces it)
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_normalized_name_projections ON projections(player_name_normalized)')
+        cursor.execute("SELECT COUNT(*) FROM projections")
+        print(f"Saved {cursor.fetchone()[0]} players back to 'projections' table.")
 
         # 9. Detach the special_teams.db
         cursor.execute("DETACH DATABASE special_teams_db")
-
-        # 10. Commit changes to projections.db
-        conn.commit()
         print("Successfully joined special teams data and detached DB.")
 
     except sqlite3.OperationalError as e:
@@ -1136,16 +1246,13 @@ def join_special_teams_data():
         try:
             cursor.execute("DETACH DATABASE special_teams_db")
         except: pass
-    finally:
-        if conn:
-            conn.close()
 # --- END NEW FUNCTION ---
 
 
 def fetch_team_standings():
     """
-    Fetches the current team standings, clears the 'team_standings' table,
-    and inserts the new data.
+    Fetches the current team standings, upserts each team's row into the
+    'team_standings' table, and removes teams no longer in the standings.
     """
     print("\n--- Fetching Team Standings ---")
 
@@ -1157,10 +1264,10 @@ def fetch_team_standings():
 
     # 2. Fetch data from the API
     try:
-        response = requests.get(API_URL)
+        response = SESSION.get(API_URL, timeout=NHL_API_TIMEOUT)
         response.raise_for_status()  # Raise an error for bad responses
 
-        data = response.json()
+        data = json_loads(response.content)
         standings_list = data.get("standings", [])
 
         if not standings_list:
@@ -1210,39 +1317,34 @@ def fetch_team_standings():
         return
 
     # 4. Write data to SQLite database
-    conn = None
     if not all_standings_data:
         print("  No processed standings data to write.")
         return
 
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_conn(DB_FILE)
         cursor = conn.cursor()
 
-        # Clear the table first
-        print(f"  Clearing 'team_standings' table...")
-        cursor.execute("DELETE FROM team_standings")
-
-        # Insert all new data
-        print(f"  Inserting {len(all_standings_data)} new team records...")
-        # --- MODIFIED ---
-        cursor.executemany('''
-        INSERT INTO team_standings (team_tricode, point_pct, goals_against_per_game, games_played)
-        VALUES (?, ?, ?, ?)
-        ''', all_standings_data)
-        # --- END MODIFIED ---
+        # One IMMEDIATE transaction for the upsert + prune, committed by the context manager
+        with conn:
+            cursor.execute("BEGIN IMMEDIATE")
+            # Upsert on the team_tricode primary key, so rows are rewritten in place
+            print(f"  Upserting {len(all_standings_data)} team records...")
+            cursor.executemany(TEAM_STANDINGS_UPSERT_SQL, all_standings_data)
+
+            # Drop any team that is no longer in the standings (e.g. a relocated franchise)
+            current_teams = [row[0] for row in all_standings_data]
+            cursor.execute(
+                f"DELETE FROM team_standings WHERE team_tricode NOT IN ({', '.join('?' for _ in current_teams)})",
+                current_teams
+            )
 
-        conn.commit()
         print("  Successfully updated 'team_standings' table.")
 
     except sqlite3.Error as e:
         print(f"  An error occurred while writing to 'team_standings': {e}")
-    finally:
-        if conn:
-            conn.close()
 
     # 4. Write data to SQLite database
-    conn = None
     if not all_standings_data:
         print("  No processed standings data to write.")
         return
@@ -1250,6 +1352,99 @@ def fetch_team_standings():
 
 
 
+def fetch_report_page(base_url, params, start):
+    """Fetches one page of an NHL stats report and returns (rows, total)."""
+    page_params = dict(params, start=start, limit=REPORT_PAGE_LIMIT)
+    # Wait only if we're over the shared rate limit
+    RATE.acquire()
+    response = SESSION.get(base_url, params=page_params, timeout=NHL_API_TIMEOUT)
+    response.raise_for_status()
+    data = json_loads(response.content)
+    return data.get('data', []), data.get('total', 0)
+
+def fetch_report_pages(base_url, params, label):
+    """
+    Fetches every page of a season-to-date NHL stats report. The first page
+    gives the total row count; the remaining pages are requested concurrently
+    and returned in page order. Returns None if any page fails, matching the
+    all-or-nothing behaviour of the per-report loaders.
+    """
+    try:
+        first_page, total = fetch_report_page(base_url, params, 0)
+        all_rows = list(first_page)
+        print(f"Retrieved {len(first_page)} {label}... (Total: {len(all_rows)})")
+
+        page_starts = range(REPORT_PAGE_LIMIT, total, REPORT_PAGE_LIMIT)
+        if first_page and page_starts:
+            with ThreadPoolExecutor(max_workers=REPORT_FETCH_WORKERS) as executor:
+                pages = executor.map(lambda start: fetch_report_page(base_url, params, start)[0], page_starts)
+                for page in pages:
+                    all_rows.extend(page)
+                    print(f"Retrieved {len(page)} {label}... (Total: {len(all_rows)})")
+
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Error fetching data from NHL API: {e}", file=sys.stderr)
+        return None
+    except Exception as e:
+        print(f"An error occurred: {e}", file=sys.stderr)
+        return None
+
+    print(f"Finished fetching. Total {label} retrieved: {len(all_rows)}")
+    return all_rows
+
+
+# Report fields stored under a different column name: table column -> API field
+REPORT_SOURCE_FIELDS = {'nhlplayerid': 'playerId'}
+
+
+def build_report_frame(rows, columns, numeric_columns=()):
+    """
+    Builds a DataFrame holding only the requested columns straight from the
+    API row dicts, instead of materializing every report field first.
+    Columns are named as in the stats tables; REPORT_SOURCE_FIELDS gives the
+    API field behind any that differ. numeric_columns are coerced to numbers
+    once here, with missing or invalid values set to 0. Columns the report
+    doesn't carry (judged from the first row, the schema is fixed per
+    report) are left out, as slicing a full frame would.
+    """
+    present = rows[0].keys() if rows else ()
+    data = {}
+    for col in columns:
+        field = REPORT_SOURCE_FIELDS.get(col, col)
+        if field not in present:
+            continue
+        values = [row.get(field) for row in rows]
+        if col in numeric_columns:
+            data[col] = pd.to_numeric(pd.Series(values), errors='coerce').fillna(0)
+        else:
+            data[col] = values
+    return pd.DataFrame(data)
+
+
+def numeric_or_zero(df, columns):
+    """
+    Returns df[columns] as numbers with missing or invalid values set to 0.
+    Columns that are already numeric (the usual case for data read back from
+    SQLite) skip the pd.to_numeric parse.
+    """
+    return pd.DataFrame({
+        col: df[col] if pd.api.types.is_numeric_dtype(df[col]) else pd.to_numeric(df[col], errors='coerce')
+        for col in columns
+    }).fillna(0)
+
+
+def per_game_rates(df, columns):
+    """
+    Divides df[columns] by df['gamesPlayed'] as one 2-D numpy operation and
+    returns the result matrix; rows with no games played get 0.
+    """
+    totals = df[columns].to_numpy(dtype=np.float64)
+    games_played = df['gamesPlayed'].to_numpy(dtype=np.float64)[:, None]
+    rates = np.zeros_like(totals)
+    np.divide(totals, games_played, out=rates, where=games_played > 0)
+    return rates
+
+
 def fetch_and_update_scoring_to_date():
     """
     Fetches the current season's to-date summary stats for all skaters
@@ -1261,10 +1456,6 @@ def fetch_and_update_scoring_to_date():
     # Base URL for the skater summary report
     base_url = "https://api.nhle.com/stats/rest/en/skater/summary"
 
-    all_players_data = []
-    start = 0
-    limit = 100
-
     # Get the current season
     current_year = date.today().year
     season_end_year = current_year if date.today().month < 7 else current_year + 1
@@ -1272,37 +1463,16 @@ def fetch_and_update_scoring_to_date():
     season_id = f"{season_start_year}{season_end_year}"
     print(f"Fetching data for season: {season_id}")
 
-    while True:
-        try:
-            params = {
-                "isAggregate": "false",
-                "cayenneExp": f"gameTypeId=2 and seasonId={season_id}",
-                "sort": '[{"property":"points","direction":"DESC"}]',
-                "start": start,
-                "limit": limit
-            }
-
-            response = requests.get(base_url, params=params)
-            response.raise_for_status()
-
-            data = response.json()
-            players_list = data.get('data', [])
-
-            if not players_list:
-                print(f"Finished fetching. Total players retrieved: {len(all_players_data)}")
-                break
-
-            all_players_data.extend(players_list)
-            print(f"Retrieved {len(players_list)} players... (Total: {len(all_players_data)})")
-            start += limit
-            time.sleep(0.5)
-
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching data from NHL API: {e}", file=sys.stderr)
-            return
-        except Exception as e:
-            print(f"An error occurred: {e}", file=sys.stderr)
-            return
+    params = {
+        "isAggregate": "false",
+        "cayenneExp": f"gameTypeId=2 and seasonId={season_id}",
+        # playerId breaks ties so rows can't shift between concurrently fetched pages
+        "sort": '[{"property":"points","direction":"DESC"},{"property":"playerId","direction":"ASC"}]'
+    }
+
+    all_players_data = fetch_report_pages(base_url, params, "players")
+    if all_players_data is None:
+        return
 
     if not all_players_data:
         print("No player data was fetched. Exiting function.")
@@ -1310,11 +1480,21 @@ def fetch_and_update_scoring_to_date():
 
     # --- Process Data with Pandas ---
     try:
-        df = pd.DataFrame(all_players_data)
+        required_cols = [
+            'nhlplayerid', 'skaterFullName', 'player_name_normalized', 'teamAbbrevs', 'gamesPlayed',
+            'goals', 'assists', 'points', 'plusMinus', 'penaltyMinutes',
+            'ppGoals', 'ppPoints', 'shootingPct', 'timeOnIcePerGame', 'shots'
+        ]
+        # Counting stats are coerced to numbers (missing -> 0) once, while building the frame
+        numeric_cols = {
+            'gamesPlayed', 'goals', 'assists', 'points', 'plusMinus',
+            'penaltyMinutes', 'ppGoals', 'ppPoints', 'timeOnIcePerGame', 'shots'
+        }
+        df = build_report_frame(all_players_data, required_cols, numeric_cols)
 
         # --- NEW: Drop Duplicates based on Player ID ---
         initial_count = len(df)
-        df.drop_duplicates(subset=['playerId'], keep='first', inplace=True)
+        df.drop_duplicates(subset=['nhlplayerid'], keep='first', inplace=True)
         if len(df) != initial_count:
              print(f"Dropped {initial_count - len(df)} duplicate skater records.")
         # -----------------------------------------------
@@ -1323,22 +1503,12 @@ def fetch_and_update_scoring_to_date():
         if 'skaterFullName' in df.columns:
              df['player_name_normalized'] = df['skaterFullName'].apply(normalize_name)
 
-        required_cols = [
-            'playerId', 'skaterFullName', 'player_name_normalized', 'teamAbbrevs', 'gamesPlayed',
-            'goals', 'assists', 'points', 'plusMinus', 'penaltyMinutes',
-            'ppGoals', 'ppPoints', 'shootingPct', 'timeOnIcePerGame', 'shots'
-        ]
-
-        # ... (rest of function remains the same) ...
         existing_cols = [col for col in required_cols if col in df.columns]
         df = df[existing_cols]
 
-        # 2. Handle 'gamesPlayed' == 0
-        df['gamesPlayed'] = pd.to_numeric(df['gamesPlayed'], errors='coerce').fillna(0)
+        # 2. 'gamesPlayed' == 0 is handled by the per-game division below
 
         # 3. Create 'ppAssists'
-        df['ppPoints'] = pd.to_numeric(df['ppPoints'], errors='coerce').fillna(0)
-        df['ppGoals'] = pd.to_numeric(df['ppGoals'], errors='coerce').fillna(0)
         df['ppAssists'] = df['ppPoints'] - df['ppGoals']
 
         # 4. List of columns to convert to per-game stats
@@ -1348,44 +1518,57 @@ def fetch_and_update_scoring_to_date():
         ]
 
         # 5. Calculate per-game stats safely
-        for col in cols_to_divide:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-                df[col] = np.where(
-                    df['gamesPlayed'] > 0,
-                    df[col] / df['gamesPlayed'],
-                    0
-                )
-
-        # 6. Final column selection and renaming
+        cols_to_divide = [col for col in cols_to_divide if col in df.columns]
+        df[cols_to_divide] = per_game_rates(df, cols_to_divide)
+
+        # 6. Final column selection
         final_cols = [
-            'playerId', 'skaterFullName', 'player_name_normalized', 'teamAbbrevs', 'gamesPlayed', 'goals', 'assists',
+            'nhlplayerid', 'skaterFullName', 'player_name_normalized', 'teamAbbrevs', 'gamesPlayed', 'goals', 'assists',
             'points', 'plusMinus', 'penaltyMinutes', 'ppGoals', 'ppAssists',
             'ppPoints', 'shootingPct', 'timeOnIcePerGame', 'shots'
         ]
 
         df_final = df[[col for col in final_cols if col in df.columns]]
-        df_final = df_final.rename(columns={'playerId': 'nhlplayerid'})
 
         # 7. Write to database
-        conn = None
         try:
-            conn = sqlite3.connect(DB_FILE)
+            conn = get_conn(DB_FILE)
             print(f"Writing {len(df_final)} records to 'scoring_to_date' table in {DB_FILE}...")
-            df_final.to_sql('scoring_to_date', conn, if_exists='replace', index=False)
+            with DB_WRITE_LOCK:
+                df_final.to_sql('scoring_to_date', conn, if_exists='replace', index=False, method='multi', chunksize=multi_insert_chunksize(df_final))
             print("Successfully wrote to-date stats to database.")
         except sqlite3.Error as e:
             print(f"Database error while writing 'scoring_to_date': {e}", file=sys.stderr)
         except Exception as e:
             print(f"An error occurred during database write: {e}", file=sys.stderr)
-        finally:
-            if conn:
-                conn.close()
 
     except Exception as e:
         print(f"An error occurred during data processing: {e}", file=sys.stderr)
 
 
+def bangers_rows(players):
+    """
+    Yields a bangers_to_date row (tuple in BANGERS_CREATE_SQL column order)
+    for each API skater record, keeping only the first record per playerId.
+    """
+    seen_ids = set()
+    for player in players:
+        player_id = player.get('playerId')
+        if player_id in seen_ids:
+            continue
+        seen_ids.add(player_id)
+
+        full_name = player.get('skaterFullName')
+        yield (
+            player_id,
+            full_name,
+            normalize_name(full_name) if full_name else None,
+            player.get('teamAbbrevs'),
+            player.get('blocksPerGame'),
+            player.get('hitsPerGame')
+        )
+
+
 def fetch_and_update_bangers_stats():
     """
     Fetches the current season's 'scoringpergame' report for all skaters
@@ -1395,96 +1578,48 @@ def fetch_and_update_bangers_stats():
     print("\n--- Starting NHL 'Bangers' Stats Fetch (Per Game) ---")
     base_url = "https://api.nhle.com/stats/rest/en/skater/scoringpergame"
 
-    all_players_data = []
-    start = 0
-    limit = 100
-
     current_year = date.today().year
     season_end_year = current_year if date.today().month < 7 else current_year + 1
     season_start_year = season_end_year - 1
     season_id = f"{season_start_year}{season_end_year}"
     print(f"Fetching data for season: {season_id}")
 
-    while True:
-        try:
-            params = {
-                "isAggregate": "false",
-                "cayenneExp": f"gameTypeId=2 and seasonId={season_id}",
-                "sort": '[{"property":"hitsPerGame","direction":"DESC"}]',
-                "start": start,
-                "limit": limit
-            }
-
-            response = requests.get(base_url, params=params)
-            response.raise_for_status()
-
-            data = response.json()
-            players_list = data.get('data', [])
-
-            if not players_list:
-                print(f"Finished fetching. Total players retrieved: {len(all_players_data)}")
-                break
-
-            all_players_data.extend(players_list)
-            print(f"Retrieved {len(players_list)} players... (Total: {len(all_players_data)})")
-            start += limit
-            time.sleep(0.5)
-
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching data from NHL API: {e}", file=sys.stderr)
-            return
-        except Exception as e:
-            print(f"An error occurred: {e}", file=sys.stderr)
-            return
+    params = {
+        "isAggregate": "false",
+        "cayenneExp": f"gameTypeId=2 and seasonId={season_id}",
+        # playerId breaks ties so rows can't shift between concurrently fetched pages
+        "sort": '[{"property":"hitsPerGame","direction":"DESC"},{"property":"playerId","direction":"ASC"}]'
+    }
+
+    all_players_data = fetch_report_pages(base_url, params, "players")
+    if all_players_data is None:
+        return
 
     if not all_players_data:
         print("No player data was fetched for bangers stats. Exiting function.")
         return
 
-    # --- Process Data with Pandas ---
+    # --- Write Rows Straight to SQLite ---
+    # The report needs no arithmetic, so the rows go from the API dicts to
+    # executemany without a DataFrame in between
     try:
-        df = pd.DataFrame(all_players_data)
-
-        # --- NEW: Drop Duplicates based on Player ID ---
-        initial_count = len(df)
-        df.drop_duplicates(subset=['playerId'], keep='first', inplace=True)
-        if len(df) != initial_count:
-             print(f"Dropped {initial_count - len(df)} duplicate banger records.")
-        # -----------------------------------------------
-
-        # --- NEW: Add Normalized Name Column ---
-        if 'skaterFullName' in df.columns:
-             df['player_name_normalized'] = df['skaterFullName'].apply(normalize_name)
-
-        # 1. Define columns to keep
-        required_cols = [
-            'playerId', 'skaterFullName', 'player_name_normalized', 'teamAbbrevs',
-            'blocksPerGame', 'hitsPerGame'
-        ]
-
-        existing_cols = [col for col in required_cols if col in df.columns]
-        df_final = df[existing_cols]
-
-        # 2. Rename playerId to nhlplayerid
-        df_final = df_final.rename(columns={'playerId': 'nhlplayerid'})
+        conn = get_conn(DB_FILE)
+        cursor = conn.cursor()
+        print(f"Writing bangers stats to 'bangers_to_date' table in {DB_FILE}...")
+        with DB_WRITE_LOCK, conn:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("DROP TABLE IF EXISTS bangers_to_date")
+            cursor.execute(BANGERS_CREATE_SQL)
+            written = cursor.executemany(BANGERS_INSERT_SQL, bangers_rows(all_players_data)).rowcount
 
-        # 3. Write to database
-        conn = None
-        try:
-            conn = sqlite3.connect(DB_FILE)
-            print(f"Writing {len(df_final)} records to 'bangers_to_date' table in {DB_FILE}...")
-            df_final.to_sql('bangers_to_date', conn, if_exists='replace', index=False)
-            print("Successfully wrote bangers stats to database.")
-        except sqlite3.Error as e:
-            print(f"Database error while writing 'bangers_to_date': {e}", file=sys.stderr)
-        except Exception as e:
-            print(f"An error occurred during database write: {e}", file=sys.stderr)
-        finally:
-            if conn:
-                conn.close()
+        if len(all_players_data) != written:
+            print(f"Dropped {len(all_players_data) - written} duplicate banger records.")
+        print(f"Successfully wrote {written} bangers records to database.")
 
+    except sqlite3.Error as e:
+        print(f"Database error while writing 'bangers_to_date': {e}", file=sys.stderr)
     except Exception as e:
-        print(f"An error occurred during data processing: {e}", file=sys.stderr)
+        print(f"An error occurred during database write: {e}", file=sys.stderr)
 
 
 def fetch_and_update_goalie_stats():
@@ -1497,47 +1632,22 @@ def fetch_and_update_goalie_stats():
     print("\n--- Starting NHL Goalie Stats Fetch (Per Game) ---")
     base_url = "https://api.nhle.com/stats/rest/en/goalie/summary"
 
-    all_goalie_data = []
-    start = 0
-    limit = 100
-
     current_year = date.today().year
     season_end_year = current_year if date.today().month < 7 else current_year + 1
     season_start_year = season_end_year - 1
     season_id = f"{season_start_year}{season_end_year}"
     print(f"Fetching goalie data for season: {season_id}")
 
-    while True:
-        try:
-            params = {
-                "isAggregate": "false",
-                "cayenneExp": f"gameTypeId=2 and seasonId={season_id}",
-                "sort": '[{"property":"wins","direction":"DESC"}]',
-                "start": start,
-                "limit": limit
-            }
-
-            response = requests.get(base_url, params=params)
-            response.raise_for_status()
-
-            data = response.json()
-            goalie_list = data.get('data', [])
-
-            if not goalie_list:
-                print(f"Finished fetching. Total goalies retrieved: {len(all_goalie_data)}")
-                break
-
-            all_goalie_data.extend(goalie_list)
-            print(f"Retrieved {len(goalie_list)} goalies... (Total: {len(all_goalie_data)})")
-            start += limit
-            time.sleep(0.5)
-
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching data from NHL API: {e}", file=sys.stderr)
-            return
-        except Exception as e:
-            print(f"An error occurred: {e}", file=sys.stderr)
-            return
+    params = {
+        "isAggregate": "false",
+        "cayenneExp": f"gameTypeId=2 and seasonId={season_id}",
+        # playerId breaks ties so rows can't shift between concurrently fetched pages
+        "sort": '[{"property":"wins","direction":"DESC"},{"property":"playerId","direction":"ASC"}]'
+    }
+
+    all_goalie_data = fetch_report_pages(base_url, params, "goalies")
+    if all_goalie_data is None:
+        return
 
     if not all_goalie_data:
         print("No goalie data was fetched. Exiting function.")
@@ -1545,11 +1655,19 @@ def fetch_and_update_goalie_stats():
 
     # --- Process Data with Pandas ---
     try:
-        df = pd.DataFrame(all_goalie_data)
+        # 1. Define columns to keep
+        required_cols = [
+            'nhlplayerid', 'goalieFullName', 'player_name_normalized', 'teamAbbrevs', 'gamesStarted', 'gamesPlayed',
+            'goalsAgainstAverage', 'losses', 'savePct', 'saves', 'shotsAgainst',
+            'shutouts', 'wins', 'goalsAgainst'
+        ]
+        # gamesPlayed and the counting stats are coerced to numbers (missing -> 0) once, here
+        numeric_cols = {'gamesPlayed', 'saves', 'shotsAgainst', 'wins', 'losses', 'shutouts', 'gamesStarted', 'goalsAgainst'}
+        df = build_report_frame(all_goalie_data, required_cols, numeric_cols)
 
         # --- NEW: Drop Duplicates based on Player ID ---
         initial_count = len(df)
-        df.drop_duplicates(subset=['playerId'], keep='first', inplace=True)
+        df.drop_duplicates(subset=['nhlplayerid'], keep='first', inplace=True)
         if len(df) != initial_count:
              print(f"Dropped {initial_count - len(df)} duplicate goalie records.")
         # -----------------------------------------------
@@ -1558,61 +1676,23 @@ def fetch_and_update_goalie_stats():
         if 'goalieFullName' in df.columns:
              df['player_name_normalized'] = df['goalieFullName'].apply(normalize_name)
 
-        # 1. Define columns to keep
-        required_cols = [
-            'playerId', 'goalieFullName', 'player_name_normalized', 'teamAbbrevs', 'gamesStarted', 'gamesPlayed',
-            'goalsAgainstAverage', 'losses', 'savePct', 'saves', 'shotsAgainst',
-            'shutouts', 'wins', 'goalsAgainst'
-        ]
-
-        # ... (rest of function remains the same) ...
         existing_cols = [col for col in required_cols if col in df.columns]
         df_final = df[existing_cols].copy()
 
-        # 2. Ensure gamesPlayed is numeric and handle division by zero
-        df_final['gamesPlayed'] = pd.to_numeric(df_final['gamesPlayed'], errors='coerce').fillna(0)
-
-        # 3. Calculate new/updated columns
-        stats_to_convert = ['saves', 'shotsAgainst', 'wins', 'losses', 'shutouts', 'gamesStarted', 'goalsAgainst']
-        for col in stats_to_convert:
-            if col in df_final.columns:
-                df_final[col] = pd.to_numeric(df_final[col], errors='coerce').fillna(0)
+        # 2-3. gamesPlayed and the stats below are already numeric; division by zero is handled per stat
 
         # Save the raw win count into a new column 'win_total'
         df_final['win_total'] = df_final['wins']
 
-        # Overwrite 'wins' with the percentage (Win % Per Game)
-        df_final['wins'] = np.where(
-            df_final['gamesPlayed'] > 0,
-            df_final['win_total'] / df_final['gamesPlayed'],
-            0
-        )
-        # Calculate saves per game and replace 'saves'
-        df_final['saves'] = np.where(
-            df_final['gamesPlayed'] > 0,
-            df_final['saves'] / df_final['gamesPlayed'],
-            0
-        )
-        # Calculate shotsAgainst per game and replace 'shotsAgainst'
-        df_final['shotsAgainst'] = np.where(
-            df_final['gamesPlayed'] > 0,
-            df_final['shotsAgainst'] / df_final['gamesPlayed'],
-            0
-        )
-        # Calculate goalsAgainst per game and replace 'goalsAgainst'
-        df_final['goalsAgainst'] = np.where(
-            df_final['gamesPlayed'] > 0,
-            df_final['goalsAgainst'] / df_final['gamesPlayed'],
-            0
+        # Overwrite 'wins' with the percentage (Win % Per Game) and replace
+        # saves, shotsAgainst and goalsAgainst with their per-game values
+        df_final[['wins', 'saves', 'shotsAgainst', 'goalsAgainst']] = per_game_rates(
+            df_final, ['win_total', 'saves', 'shotsAgainst', 'goalsAgainst']
         )
 
-        # 4. Rename playerId to nhlplayerid
-        df_final = df_final.rename(columns={'playerId': 'nhlplayerid'})
-
         # 5. Connect to DB, join with standings, and write
-        conn = None
         try:
-            conn = sqlite3.connect(DB_FILE)
+            conn = get_conn(DB_FILE)
 
             print("  Reading 'team_standings' for join...")
             df_standings = pd.read_sql_query(
@@ -1624,82 +1704,96 @@ def fetch_and_update_goalie_stats():
                 print("  Warning: 'team_standings' table is empty. 'startpct' will be 0.")
                 df_standings = pd.DataFrame(columns=['team_tricode', 'team_games_played'])
 
-            # Merge with goalie data
-            df_final = pd.merge(
-                df_final,
-                df_standings,
-                left_on='teamAbbrevs',
-                right_on='team_tricode',
-                how='left'
-            )
+            # Look up each goalie's team games played (team_tricode is the standings key)
+            team_games = df_standings.set_index('team_tricode')['team_games_played']
+            team_games_played = pd.to_numeric(df_final['teamAbbrevs'].map(team_games), errors='coerce').fillna(0)
 
             # Calculate startpct
-            df_final['team_games_played'] = pd.to_numeric(df_final['team_games_played'], errors='coerce').fillna(0)
             df_final['startpct'] = np.where(
-                df_final['team_games_played'] > 0,
-                df_final['gamesStarted'] / df_final['team_games_played'],
+                team_games_played > 0,
+                df_final['gamesStarted'] / team_games_played,
                 0
             )
 
-            # Clean up columns from merge
-            df_final = df_final.drop(columns=['team_tricode', 'team_games_played'], errors='ignore')
-
             print(f"Writing {len(df_final)} records to 'goalie_to_date' table in {DB_FILE}...")
-            df_final.to_sql('goalie_to_date', conn, if_exists='replace', index=False)
+            with DB_WRITE_LOCK:
+                df_final.to_sql('goalie_to_date', conn, if_exists='replace', index=False, method='multi', chunksize=multi_insert_chunksize(df_final))
             print("Successfully wrote goalie stats to database.")
 
         except sqlite3.Error as e:
             print(f"Database error while writing 'goalie_to_date': {e}", file=sys.stderr)
         except Exception as e:
             print(f"An error occurred during database write: {e}", file=sys.stderr)
-        finally:
-            if conn:
-                conn.close()
 
     except Exception as e:
         print(f"An error occurred during data processing: {e}", file=sys.stderr)
 
 
 
+def fetch_to_date_stats():
+    """
+    Runs the skater, bangers and goalie season-to-date fetches concurrently.
+    They hit separate NHL endpoints and write separate tables, so only the
+    HTTP waits overlap; the table writes are serialized by DB_WRITE_LOCK.
+    The goalie startpct reads team_standings, so fetch_team_standings must
+    finish before this is called.
+    """
+    fetches = (
+        fetch_and_update_scoring_to_date,
+        fetch_and_update_bangers_stats,
+        fetch_and_update_goalie_stats,
+    )
+    with ThreadPoolExecutor(max_workers=TO_DATE_FETCH_WORKERS) as executor:
+        futures = [executor.submit(fetch) for fetch in fetches]
+        # Re-raise anything a fetch didn't handle itself, as the serial calls did
+        for future in futures:
+            future.result()
+
+
 def copy_standings_to_projections():
     """
     Copies the 'team_standings' table from special_teams.db
     into projections.db as a new, separate table.
     """
     print("\n--- Copying 'team_standings' table to projections.db ---")
-    conn = None
     try:
         # 1. Connect to the MAIN projections.db
-        conn = sqlite3.connect(PROJECTIONS_DB_FILE)
+        conn = get_conn(PROJECTIONS_DB_FILE)
         cursor = conn.cursor()
 
         # 2. Attach the special_teams.db
         print(f"  Attaching Special Teams DB: {DB_FILE}")
         cursor.execute(f"ATTACH DATABASE '{DB_FILE}' AS special_teams_db")
 
-        # 3. Load 'team_standings' data from special_teams.db into a DataFrame
-        print("  Reading 'team_standings' from special_teams_db...")
-        df_standings = pd.read_sql_query("SELECT * FROM special_teams_db.team_standings", conn)
-
-        if df_standings.empty:
-            print("  Warning: 'team_standings' in special_teams.db is empty. An empty table will be created.")
-
-        # 4. Write this DataFrame to a new table in projections.db
-        print(f"  Writing {len(df_standings)} records to 'team_standings' table in {PROJECTIONS_DB_FILE}...")
-
-        # --- MODIFIED ---
-        df_standings.to_sql('team_standings',
-                            conn,
-                            if_exists='replace',
-                            index=False,
-                            dtype={'team_tricode': 'TEXT', 'point_pct': 'TEXT', 'goals_against_per_game': 'REAL', 'games_played': 'INTEGER'})
-        # --- END MODIFIED ---
+        # 3. Rebuild 'team_standings' straight from special_teams_db in one transaction.
+        # The explicit schema keeps the column types the pandas copy used to declare.
+        print("  Copying 'team_standings' from special_teams_db...")
+        with conn:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("DROP TABLE IF EXISTS main.team_standings")
+            cursor.execute('''
+            CREATE TABLE main.team_standings (
+                team_tricode TEXT,
+                point_pct TEXT,
+                goals_against_per_game REAL,
+                games_played INTEGER
+            )
+            ''')
+            cursor.execute('''
+            INSERT INTO main.team_standings (team_tricode, point_pct, goals_against_per_game, games_played)
+            SELECT team_tricode, point_pct, goals_against_per_game, games_played
+            FROM special_teams_db.team_standings
+            ''')
+            copied = cursor.rowcount
+            cursor.execute("CREATE INDEX idx_team_standings_tricode ON team_standings (team_tricode)")
+
+        if copied == 0:
+            print("  Warning: 'team_standings' in special_teams.db is empty. An empty table was created.")
+        else:
+            print(f"  Wrote {copied} records to 'team_standings' table in {PROJECTIONS_DB_FILE}.")
 
-        # 5. Detach the special_teams.db
+        # 4. Detach the special_teams.db
         cursor.execute("DETACH DATABASE special_teams_db")
-
-        # 6. Commit changes to projections.db
-        conn.commit()
         print("  Successfully copied 'team_standings' table and detached DB.")
 
     except sqlite3.OperationalError as e:
@@ -1713,9 +1807,6 @@ def copy_standings_to_projections():
         try:
             cursor.execute("DETACH DATABASE special_teams_db")
         except: pass
-    finally:
-        if conn:
-            conn.close()
 
 
 def create_stats_to_date_table():
@@ -1724,9 +1815,8 @@ def create_stats_to_date_table():
     Saves to 'stats_to_date'.
     """
     print(f"\n--- Creating 'stats_to_date' table in {PROJECTIONS_DB_FILE} ---")
-    conn = None
     try:
-        conn = sqlite3.connect(PROJECTIONS_DB_FILE)
+        conn = get_conn(PROJECTIONS_DB_FILE)
         cursor = conn.cursor()
         print(f"  Attaching Special Teams DB: {DB_FILE}")
         cursor.execute(f"ATTACH DATABASE '{DB_FILE}' AS st_db")
@@ -1746,25 +1836,17 @@ def create_stats_to_date_table():
         """)
 
         print("  Reading source tables...")
-        df_proj = pd.read_sql_query("SELECT * FROM projections", conn)
+        # 'gp' comes back as 'GP' (see read_projections)
+        df_proj = read_projections(conn)
         if df_proj.empty:
             print("  Error: Projections empty.")
             return
 
-        # --- FIX: Standardize 'gp' to 'GP' immediately ---
-        if 'gp' in df_proj.columns:
-            print("  Standardizing 'gp' column to 'GP' in projections...")
-            df_proj = df_proj.rename(columns={'gp': 'GP'})
-        # ------------------------------------------------
-
         # Clean Projections
         df_proj['nhlplayerid'] = pd.to_numeric(df_proj['nhlplayerid'], errors='coerce').fillna(0).astype(int)
         df_proj = df_proj.drop_duplicates(subset=['nhlplayerid'])
 
         # --- SCORING ---
-        df_scoring = pd.read_sql_query("SELECT * FROM st_db.scoring_to_date", conn)
-        df_scoring['nhlplayerid'] = pd.to_numeric(df_scoring['nhlplayerid'], errors='coerce').fillna(0).astype(int)
-
         # Prep Scoring Columns
         scoring_rename_map = {
             'gamesPlayed': 'GPskater', 'goals': 'G', 'assists': 'A', 'points': 'P',
@@ -1772,35 +1854,32 @@ def create_stats_to_date_table():
             'ppAssists': 'PPA', 'ppPoints': 'PPP', 'shootingPct': 'shootingPct',
             'timeOnIcePerGame': 'timeOnIcePerGame', 'shots': 'SOG'
         }
-        # Rename columns in df_scoring BEFORE join
-        df_scoring = df_scoring.rename(columns=scoring_rename_map)
+        # Read only the columns the join uses, renamed in the SELECT
+        df_scoring = read_smart_join_source(conn, 'scoring_to_date', scoring_rename_map)
+        df_scoring['nhlplayerid'] = pd.to_numeric(df_scoring['nhlplayerid'], errors='coerce').fillna(0).astype(int)
         scoring_data_cols = list(scoring_rename_map.values())
 
         # Perform Smart Join
         df_merged = perform_smart_join(df_proj, df_scoring, scoring_data_cols, 'scoring_to_date', conn)
 
         # --- BANGERS ---
-        df_bangers = pd.read_sql_query("SELECT * FROM st_db.bangers_to_date", conn)
-        df_bangers['nhlplayerid'] = pd.to_numeric(df_bangers['nhlplayerid'], errors='coerce').fillna(0).astype(int)
-
         bangers_rename_map = {'blocksPerGame': 'BLK', 'hitsPerGame': 'HIT'}
-        df_bangers = df_bangers.rename(columns=bangers_rename_map)
+        df_bangers = read_smart_join_source(conn, 'bangers_to_date', bangers_rename_map)
+        df_bangers['nhlplayerid'] = pd.to_numeric(df_bangers['nhlplayerid'], errors='coerce').fillna(0).astype(int)
         bangers_data_cols = list(bangers_rename_map.values())
 
         # Perform Smart Join
         df_merged = perform_smart_join(df_merged, df_bangers, bangers_data_cols, 'bangers_to_date', conn)
 
         # --- GOALIES ---
-        df_goalie = pd.read_sql_query("SELECT * FROM st_db.goalie_to_date", conn)
-        df_goalie['nhlplayerid'] = pd.to_numeric(df_goalie['nhlplayerid'], errors='coerce').fillna(0).astype(int)
-
         goalie_rename_map = {
             'gamesStarted': 'GS', 'gamesPlayed': 'GP', 'goalsAgainstAverage': 'GAA',
             'losses': 'L', 'savePct': 'SVpct', 'saves': 'SV', 'shotsAgainst': 'SA',
             'shutouts': 'SHO', 'wins': 'W', 'win_total': 'win_total',
             'goalsAgainst': 'GA', 'startpct': 'startpct'
         }
-        df_goalie = df_goalie.rename(columns=goalie_rename_map)
+        df_goalie = read_smart_join_source(conn, 'goalie_to_date', goalie_rename_map)
+        df_goalie['nhlplayerid'] = pd.to_numeric(df_goalie['nhlplayerid'], errors='coerce').fillna(0).astype(int)
         goalie_data_cols = list(goalie_rename_map.values())
 
         # Perform Smart Join
@@ -1821,7 +1900,7 @@ def create_stats_to_date_table():
         df_final_write = df_merged[final_cols].copy()
 
         print(f"  Writing {len(df_final_write)} records to 'stats_to_date'...")
-        df_final_write.to_sql('stats_to_date', conn, if_exists='replace', index=False)
+        df_final_write.to_sql('stats_to_date', conn, if_exists='replace', index=False, method='multi', chunksize=multi_insert_chunksize(df_final_write))
 
         cursor.execute("DETACH DATABASE st_db")
         conn.commit()
@@ -1829,8 +1908,6 @@ def create_stats_to_date_table():
 
     except Exception as e:
         print(f"Error: {e}")
-    finally:
-        if conn: conn.close()
 
 
 def calculate_and_save_to_date_ranks():
@@ -1840,10 +1917,9 @@ def calculate_and_save_to_date_ranks():
     """
     print("\n--- Calculating and Adding Category Ranks to 'stats_to_date' ---")
 
-    conn = None
     try:
         # 1. Connect to the database and read the table
-        conn = sqlite3.connect(PROJECTIONS_DB_FILE)
+        conn = get_conn(PROJECTIONS_DB_FILE)
 
         # Check if table exists before reading
         cursor = conn.cursor()
@@ -1885,14 +1961,15 @@ def calculate_and_save_to_date_ranks():
             num_skaters = skater_mask.sum()
             print(f"  Ranking {num_skaters} skaters...")
 
+            # Ensure the skater stats are numeric, fill NaNs with 0 (one pass for all of them)
+            skater_stat_cols = [stat for stat in skater_stats_to_rank if stat in existing_columns]
+            df[skater_stat_cols] = numeric_or_zero(df, skater_stat_cols)
+
             for stat in skater_stats_to_rank:
                 if stat in existing_columns:
                     new_col_name = f"{stat}_cat_rank"
                     new_rank_columns.append(new_col_name)
 
-                    # Ensure stat is numeric, fill NaNs with 0
-                    df[stat] = pd.to_numeric(df[stat], errors='coerce').fillna(0)
-
                     # Get the ranks (1 to N) just for skaters, sorted descending
                     # .rank(method='first') handles ties, 'ascending=False' ranks highest value as 1
                     skater_ranks = df.loc[skater_mask, stat].rank(method='first', ascending=False)
@@ -1926,14 +2003,15 @@ def calculate_and_save_to_date_ranks():
             num_goalies = goalie_mask.sum()
             print(f"  Ranking {num_goalies} goalies...")
 
+            # Ensure the goalie stats are numeric, fill NaNs with 0 (one pass for all of them)
+            goalie_stat_cols = [stat for stat in goalie_stats_to_rank if stat in existing_columns]
+            df[goalie_stat_cols] = numeric_or_zero(df, goalie_stat_cols)
+
             for stat, is_inverse in goalie_stats_to_rank.items():
                 if stat in existing_columns:
                     new_col_name = f"{stat}_cat_rank"
                     new_rank_columns.append(new_col_name)
 
-                    # Ensure stat is numeric, fill NaNs with 0
-                    df[stat] = pd.to_numeric(df[stat], errors='coerce').fillna(0)
-
                     # Rank goalies, respecting inverse (e.g., GAA, L)
                     # 'ascending=is_inverse' means it's True for inverse stats (lower is better)
                     goalie_ranks = df.loc[goalie_mask, stat].rank(method='first', ascending=is_inverse)
@@ -1970,6 +2048,8 @@ def calculate_and_save_to_date_ranks():
             conn,
             if_exists='replace',
             index=False,
+            method='multi',
+            chunksize=multi_insert_chunksize(df),
             # Ensure key types are maintained
             dtype={'nhlplayerid': 'INTEGER', 'player_id': 'INTEGER'}
         )
@@ -1981,9 +2061,6 @@ def calculate_and_save_to_date_ranks():
         print(f"Database error during rank calculation: {e}", file=sys.stderr)
     except Exception as e:
         print(f"An error occurred during rank calculation: {e}", file=sys.stderr)
-    finally:
-        if conn:
-            conn.close()
 
 
 def create_combined_projections():
@@ -1996,9 +2073,8 @@ def create_combined_projections():
     - Data columns existing in only one table are carried over.
     """
     print(f"\n--- Creating 'combined_projections' table in {PROJECTIONS_DB_FILE} ---")
-    conn = None
     try:
-        conn = sqlite3.connect(PROJECTIONS_DB_FILE)
+        conn = get_conn(PROJECTIONS_DB_FILE)
         cursor = conn.cursor()
 
         # 1. Check if source tables exist
@@ -2014,15 +2090,10 @@ def create_combined_projections():
 
         # 2. Load tables into DataFrames
         print("  Reading 'projections' and 'stats_to_date' tables...")
-        df_proj = pd.read_sql_query("SELECT * FROM projections", conn)
+        # 'gp' comes back as 'GP' (see read_projections), matching stats_to_date
+        df_proj = read_projections(conn)
         df_stats = pd.read_sql_query("SELECT * FROM stats_to_date", conn)
 
-        # --- FIX: Standardize conflicting column names ('gp' vs 'GP') ---
-        if 'gp' in df_proj.columns:
-            print("  Standardizing 'gp' column to 'GP'...")
-            df_proj = df_proj.rename(columns={'gp': 'GP'})
-        # --- END FIX ---
-
         if df_proj.empty:
             print("  Warning: 'projections' table is empty.")
             return
@@ -2147,6 +2218,8 @@ def create_combined_projections():
             conn,
             if_exists='replace',
             index=False,
+            method='multi',
+            chunksize=multi_insert_chunksize(df_final),
             dtype=dtype_map
         )
 
@@ -2157,9 +2230,6 @@ def create_combined_projections():
         print(f"Database error during 'combined_projections' creation: {e}", file=sys.stderr)
     except Exception as e:
         print(f"An error occurred during 'combined_projections' creation: {e}", file=sys.stderr)
-    finally:
-        if conn:
-            conn.close()
 
 
 if __name__ == "__main__":
@@ -2169,9 +2239,8 @@ if __name__ == "__main__":
     fetch_team_stats_weekly()
 
     # --- NEW FUNCTION CALL ADDED ---
-    fetch_and_update_scoring_to_date()
-    fetch_and_update_bangers_stats()
-    fetch_and_update_goalie_stats()
+    # Needs team_standings (fetched above) for the goalie startpct
+    fetch_to_date_stats()
     # Run the main data fetch and processing
     new_data_fetched = fetch_daily_pp_stats()
 
@@ -2181,11 +2250,8 @@ if __name__ == "__main__":
 
     print("\n--- Starting Post-Fetch Table Processing ---")
 
-    # Create/update the "last game" summary table
-    create_last_game_pp_table(DB_FILE)
-
-    # Create/update the "last week" summary table
-    create_last_week_pp_table(DB_FILE)
+    # Create/update the "last game" and "last week" summary tables
+    create_pp_summary_tables(DB_FILE)
 
     # Join the new summary data into projections.db
     join_special_teams_data()